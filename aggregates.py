@@ -0,0 +1,89 @@
+import pandas as pd
+import streamlit as st
+from dataset import DATASET_PATH, dataset_version, load_dataset
+from filters import slice_frame
+from reduction import binned_counts, binned_kde
+from shared_cache import cache_key, get_or_compute
+
+# Dashboard KPIs, crosstabs and distributions, computed together from grouped
+# totals of the dataset and cached per dataset version and filter slice. The
+# totals of separate batches add up, so the out-of-core mode builds the same
+# result while streaming.
+GROUP_COLUMNS = ["Gender", "Churn", "SeniorCitizen"]
+POSITIVE = "Yes"
+TENURE_BINS = 10
+
+
+def group_totals(data):
+    """Row counts and sums per (Gender, Churn, SeniorCitizen); batch totals add up."""
+    return data.groupby(GROUP_COLUMNS, observed=True, dropna=False).agg(
+        rows=("Tenure", "size"),
+        tenure_sum=("Tenure", "sum"),
+        tenure_count=("Tenure", "count"),
+        monthly_sum=("MonthlyCharges", "sum"),
+        monthly_count=("MonthlyCharges", "count"),
+    )
+
+
+def tenure_totals(data):
+    """Monthly charge sums and counts per tenure month; batch totals add up."""
+    return data.groupby("Tenure")["MonthlyCharges"].agg(monthly_sum="sum", monthly_count="count")
+
+
+def combine_totals(parts):
+    """Adds up the group_totals or tenure_totals of separate batches."""
+    parts = [part for part in parts if len(part)]
+    if len(parts) == 1:
+        return parts[0]
+    combined = pd.concat(parts)
+    return combined.groupby(level=list(range(combined.index.nlevels))).sum()
+
+
+def summarize_totals(grouped, tenure, tenure_histogram, total_charges_kde):
+    """Builds the KPIs, crosstabs and distributions from grouped totals."""
+    # Everything below works on the grouped table, not on the rows
+    totals = grouped.sum()
+    rows = grouped["rows"].rename("count")
+    total = totals["rows"]
+
+    churn_counts = rows.groupby(level="Churn", observed=True).sum().sort_values(ascending=False)
+    senior_counts = rows.groupby(level="SeniorCitizen", observed=True).sum()
+    gender_counts = rows.groupby(level="Gender", observed=True).sum().sort_values(ascending=False)
+
+    return {
+        "rows": int(total),
+        "churn_rate": float(churn_counts.get(POSITIVE, 0) / total * 100),
+        "avg_tenure": float(totals["tenure_sum"] / totals["tenure_count"]),
+        "avg_monthly_charges": float(totals["monthly_sum"] / totals["monthly_count"]),
+        "senior_citizen_ratio": float(senior_counts.get(POSITIVE, 0) / total * 100),
+        "gender_balance": gender_counts / total * 100,
+        "churn_counts": churn_counts,
+        "senior_counts": senior_counts,
+        "gender_counts": gender_counts,
+        "gender_churn": rows.groupby(level=["Gender", "Churn"], observed=True).sum()
+                            .unstack("Churn", fill_value=0),
+        "gender_churn_senior": rows.unstack(["Churn", "SeniorCitizen"], fill_value=0)
+                                   .sort_index(axis=1),
+        "tenure_histogram": tenure_histogram,
+        "total_charges_kde": total_charges_kde,
+        "monthly_by_tenure": tenure["monthly_sum"] / tenure["monthly_count"],
+    }
+
+
+def compute_aggregates(data):
+    """Computes all dashboard KPIs, crosstabs and distributions of an in-memory frame."""
+    return summarize_totals(group_totals(data), tenure_totals(data),
+                            binned_counts(data["Tenure"], bins=TENURE_BINS),
+                            binned_kde(data["TotalCharges"]))
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _aggregates_for_version(path, version, filters=()):
+    # Computed once across worker processes when the shared cache tier is on
+    return get_or_compute("aggregates", cache_key(path, version, filters),
+                          lambda: compute_aggregates(slice_frame(version, filters, load_dataset(path))))
+
+
+def load_aggregates(path=DATASET_PATH, filters=()):
+    """Returns the cached aggregates for the current dataset version and slice."""
+    return _aggregates_for_version(path, dataset_version(path), filters)
@@ -1,27 +1,42 @@
+import importlib
+
 import streamlit as st
-from home import home_page
-from data import data_page
-from predict import predict_page
-from dashboard import dashboard_page
 from auth import authenticate
+from instrumentation import profiled_run, show_timings_panel, span
+
+# Page name -> (module, render function). Page modules are imported on first
+# selection, so the login form and the light pages never pay for the
+# plotting and modelling stacks. `python benchmarks/imports.py` reports the
+# import cost of each page.
+PAGES = {
+    "Home": ("home", "home_page"),
+    "Data": ("data", "data_page"),
+    "Predict": ("predict", "predict_page"),
+    "Dashboard": ("dashboard", "dashboard_page"),
+}
+
+
+def load_page(page):
+    module, function = PAGES[page]
+    return getattr(importlib.import_module(module), function)
+
 
 def main():
-    authenticate() #check user credentials
-    if st.session_state.authenticated:
-         #creating a side bar
-        st.sidebar.title("Navigator")
-        st.sidebar.write("Use this to select between pages")
-        page =st.sidebar.selectbox("Navigate",["Home","Data", "Predict","Dashboard"])
-     
-        if page == "Home":
-            home_page()
-        elif page == "Data":
-            data_page()
-        elif page == "Predict":
-            predict_page()
-        elif page == "Dashboard":
-            dashboard_page()
+    with profiled_run("app"):
+        with span("auth"):
+            authenticate() #check user credentials
+        if st.session_state.authenticated:
+             #creating a side bar
+            st.sidebar.title("Navigator")
+            st.sidebar.write("Use this to select between pages")
+            page =st.sidebar.selectbox("Navigate",list(PAGES))
+
+            with span(f"load.page.{page}"):
+                render = load_page(page)
+            with span(f"page.{page}"):
+                render()
+    show_timings_panel()
 
 
 if __name__ =="__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,5 +1,4 @@
 import streamlit as st
-from home import home_page
 
 # Authentication function
 def authenticate():
@@ -27,6 +26,7 @@ def login_form():
         if submitted:
             if username == "admin" and password == "password":  # Check credentials
                 st.session_state.authenticated = True
+                st.session_state.username = username
                 st.success("Successfully logged in!")
             else:
                 st.error("Invalid credentials")
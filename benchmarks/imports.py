@@ -0,0 +1,99 @@
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from app import PAGES  # noqa: E402
+
+# Import-time profile of the app entry point and each page module, from
+# `python -X importtime` in fresh interpreters. A page is measured on top of
+# app.py, so its numbers are what selecting it the first time costs. Run
+# from the repository root:
+#
+#   python benchmarks/imports.py --output imports_before.json
+#   python benchmarks/imports.py --compare imports_before.json
+
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.2
+TOP_PACKAGES = 8
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_profile(module, preload=()):
+    """Returns {module name: (self us, cumulative us)} for the imports `import module` triggers."""
+    code = "".join(f"import {name}; " for name in preload) + "import sys; sys.stderr.write('--\\n'); " \
+           f"import {module}"
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT,
+                            capture_output=True, text=True, check=True).stderr
+    profile = {}
+    for line in stderr.split("--\n", 1)[1].splitlines():
+        match = LINE.match(line)
+        if match:
+            profile[match.group(4)] = (int(match.group(1)), int(match.group(2)))
+    return profile
+
+
+def measure(module, preload, repeat):
+    """Median cumulative import time of module and the slowest top-level packages it pulls in."""
+    profiles = [import_profile(module, preload) for _ in range(repeat)]
+    totals = [profile[module][1] for profile in profiles if module in profile]
+    packages = {}
+    for profile in profiles:
+        for name, (_, cumulative) in profile.items():
+            if "." not in name and name != module:
+                packages.setdefault(name, []).append(cumulative)
+    slowest = sorted(((float(np.median(times)), name) for name, times in packages.items()), reverse=True)
+    return {"name": f"import.{module}", "median": float(np.median(totals)) / 1e6 if totals else 0.0,
+            "modules": len(profiles[0]),
+            "packages": {name: seconds / 1e6 for seconds, name in slowest[:TOP_PACKAGES]}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time profile of the app and its pages")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--output", default="import_profile.json")
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON results of an earlier run")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="slowdown ratio above 1 + threshold counts as a regression")
+    args = parser.parse_args()
+
+    results = [measure("app", ("streamlit",), args.repeat)]
+    for page, (module, _) in PAGES.items():
+        results.append(measure(module, ("app",), args.repeat))
+
+    for result in results:
+        print(f"{result['name']:<30}{result['median'] * 1000:>9.1f} ms  ({result['modules']} modules)")
+        for name, seconds in result["packages"].items():
+            print(f"    {name:<26}{seconds * 1000:>9.1f} ms")
+    with open(args.output, "w") as file:
+        json.dump({"repeat": args.repeat, "results": results}, file, indent=2)
+        file.write("\n")
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            before = {result["name"]: result for result in json.load(file)["results"]}
+        regressions = []
+        print(f"\n{'module':<30}{'before':>11}{'after':>11}{'ratio':>8}")
+        for result in results:
+            if result["name"] not in before or not before[result["name"]]["median"]:
+                continue
+            ratio = result["median"] / before[result["name"]]["median"]
+            flag = "  REGRESSION" if ratio > 1 + args.threshold else ""
+            if flag:
+                regressions.append(result["name"])
+            print(f"{result['name']:<30}{before[result['name']]['median'] * 1000:>9.1f}ms"
+                  f"{result['median'] * 1000:>9.1f}ms{ratio:>8.2f}{flag}")
+        if regressions:
+            print(f"\n{len(regressions)} import(s) regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
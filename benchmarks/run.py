@@ -0,0 +1,292 @@
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import dashboard  # noqa: E402
+from aggregates import compute_aggregates  # noqa: E402
+from compare import compare_models, fitted_models  # noqa: E402
+from dataset import DATASET_PATH, _ensure_parquet, read_csv_typed  # noqa: E402
+from explain import Explainer, top_factors  # noqa: E402
+from figures import render_figure  # noqa: E402
+from prediction_cache import CachedScorer, PredictionCache  # noqa: E402
+from registry import MODELS_PATHS  # noqa: E402
+from scoring import (DEFAULT_CHUNK_SIZE, PIPELINE_PATH, SingleRowScorer, read_artifact,  # noqa: E402
+                     score_frame)
+from summary_stats import DatasetSummary  # noqa: E402
+
+from single_row import measure  # noqa: E402
+
+# Benchmark suite for the load, score and render hot paths, run without a
+# browser against synthetic datasets resampled from data/train_set.csv.
+# Results are written as JSON and can be compared between runs. Run from the
+# repository root:
+#
+#   python benchmarks/run.py --sizes 10k,1m --output before.json
+#   python benchmarks/run.py --sizes 10k,1m --output after.json --compare before.json
+#
+# Synthetic datasets are generated once into benchmarks/.data and reused.
+
+DATA_DIR = os.path.join(ROOT, "benchmarks", ".data")
+DEFAULT_SIZES = "10k,1m,10m"
+DEFAULT_REPEAT = 3
+DEFAULT_THRESHOLD = 0.2
+SINGLE_ROW_ITERATIONS = 500
+GENERATE_CHUNK_ROWS = 1_000_000
+
+
+def parse_size(text):
+    text = text.strip().lower()
+    scale = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    return int(float(text.rstrip("km")) * scale)
+
+
+def synthetic_dataset(rows, source=DATASET_PATH, seed=0):
+    """Returns the path of a CSV with `rows` rows resampled from the source dataset."""
+    path = os.path.join(DATA_DIR, f"train_set_{rows}.csv")
+    if os.path.exists(path):
+        return path
+    base = pd.read_csv(source)
+    rng = np.random.default_rng(seed)
+    os.makedirs(DATA_DIR, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    written = 0
+    while written < rows:
+        count = min(GENERATE_CHUNK_ROWS, rows - written)
+        chunk = base.iloc[rng.integers(0, len(base), count)]
+        chunk.to_csv(tmp_path, mode="a" if written else "w", header=not written, index=False)
+        written += count
+    os.replace(tmp_path, path)
+    return path
+
+
+def time_call(fn, repeat):
+    """Returns wall-clock seconds for `repeat` calls of fn."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def summarize(timings):
+    timings = np.asarray(timings)
+    return {"min": float(timings.min()), "median": float(np.median(timings)),
+            "mean": float(timings.mean()), "repeat": len(timings)}
+
+
+def is_fitted(model):
+    from sklearn.base import BaseEstimator
+    from sklearn.utils.validation import check_is_fitted
+    if not isinstance(model, BaseEstimator):
+        return False
+    try:
+        check_is_fitted(model)
+    except Exception:
+        return False
+    return True
+
+
+def chart_builders(data, aggregates):
+    """The dashboard's matplotlib charts, keyed by chart id."""
+    return {
+        "churn_countplot": lambda: dashboard.churn_countplot(aggregates),
+        "senior_citizen_countplot": lambda: dashboard.senior_citizen_countplot(aggregates),
+        "tenure_histogram": lambda: dashboard.tenure_histogram(aggregates),
+        "monthly_charges_boxplot": lambda: dashboard.monthly_charges_boxplot(data),
+        "gender_barplot": lambda: dashboard.gender_barplot(aggregates),
+        "churn_pieplot": lambda: dashboard.churn_pieplot(aggregates),
+        "total_charges_kdeplot": lambda: dashboard.total_charges_kdeplot(aggregates),
+        "charges_bubbleplot:Sample": lambda: dashboard.charges_bubbleplot(data, "Sample"),
+        "charges_bubbleplot:Hexbin": lambda: dashboard.charges_bubbleplot(data, "Hexbin"),
+        "charges_bubbleplot:2D histogram": lambda: dashboard.charges_bubbleplot(data, "2D histogram"),
+        "tenure_charges_regplot": lambda: dashboard.tenure_charges_regplot(data),
+        "churn_charges_boxplot": lambda: dashboard.churn_charges_boxplot(data),
+        "churn_charges_violinplot": lambda: dashboard.churn_charges_violinplot(data),
+        "gender_churn_heatmap": lambda: dashboard.gender_churn_heatmap(aggregates["gender_churn"]),
+        "gender_churn_stacked_bar": lambda: dashboard.gender_churn_stacked_bar(aggregates["gender_churn"]),
+        "charges_pairplot": lambda: dashboard.charges_pairplot(data),
+        "charges_scatter_3d": lambda: dashboard.charges_scatter_3d(data),
+        "gender_churn_senior_clustered_bar":
+            lambda: dashboard.gender_churn_senior_clustered_bar(aggregates["gender_churn_senior"]),
+    }
+
+
+class Suite:
+    def __init__(self, repeat, patterns):
+        self.repeat = repeat
+        self.patterns = patterns
+        self.results = []
+
+    def selected(self, name):
+        return not self.patterns or any(fnmatch.fnmatch(name, p) for p in self.patterns)
+
+    def run(self, name, fn, rows=None, repeat=None):
+        if not self.selected(name):
+            return
+        try:
+            result = summarize(time_call(fn, repeat or self.repeat))
+        except Exception as e:
+            result = {"error": f"{type(e).__name__}: {e}"}
+        self.record(name, rows, result)
+
+    def record(self, name, rows, result):
+        self.results.append({"name": name, "rows": rows, **result})
+        label = f"{name} [{rows:,} rows]" if rows else name
+        if "median" in result:
+            print(f"{label:<58}{result['median'] * 1000:>12.2f} ms", flush=True)
+        else:
+            print(f"{label:<58}  {result.get('error') or result.get('skipped')}", flush=True)
+
+
+def run_models(suite):
+    """Model loading and single-row scoring, which do not depend on dataset size."""
+    for name, path in {"pipeline": PIPELINE_PATH, **MODELS_PATHS}.items():
+        read_artifact(path)  # imports the estimator's modules outside the timing
+        suite.run(f"load_model.{name}", lambda: read_artifact(path))
+        suite.run(f"load_model.{name}.no_mmap", lambda: read_artifact(path, mmap_mode=None))
+
+    pipeline = read_artifact(PIPELINE_PATH)
+    if suite.selected("score.single.pipeline"):
+        scorer = SingleRowScorer(pipeline)
+        frame = pd.read_csv(DATASET_PATH)[list(pipeline.feature_names_in_)]
+        records = frame.head(1000).to_dict("records")
+        timings = measure(scorer.score, records, SINGLE_ROW_ITERATIONS) / 1000
+        suite.record("score.single.pipeline", None, summarize(timings))
+    return pipeline
+
+
+def run_size(suite, rows, pipeline):
+    path = synthetic_dataset(rows)
+
+    # Data page: typed CSV parse on a cache miss, Parquet read on a hit
+    suite.run("load.csv", lambda: read_csv_typed(path), rows)
+    parquet_path, _ = _ensure_parquet(path)
+    suite.run("load.parquet", lambda: pd.read_parquet(parquet_path), rows)
+    data = pd.read_parquet(parquet_path)
+
+    # Data page summary table: pandas describe against the mergeable summaries
+    suite.run("summary.describe", lambda: data.describe(include="all"), rows)
+    suite.run("summary.build", lambda: DatasetSummary().update(data).to_frame(), rows)
+
+    # Dashboard KPIs and charts
+    suite.run("kpis", lambda: compute_aggregates(data), rows)
+    aggregates = compute_aggregates(data)
+    for chart_id, build in chart_builders(data, aggregates).items():
+        suite.run(f"render.{chart_id}", lambda: render_figure(build), rows)
+    # The Plotly figures are built server side and drawn in the browser;
+    # a fresh version on every call bypasses their st.cache_data entry
+    calls = iter(range(1 << 30))
+    suite.run("render.sankey", lambda: dashboard.sankey_figure(f"bench-{next(calls)}", aggregates), rows)
+    suite.run("render.radial", lambda: dashboard.radial_figure(f"bench-{next(calls)}", aggregates), rows)
+
+    # Bulk scoring in the chunks the streaming upload path uses
+    features = data[list(pipeline.feature_names_in_)]
+
+    def score_bulk(predict_proba):
+        for start in range(0, len(features), DEFAULT_CHUNK_SIZE):
+            predict_proba(features.iloc[start:start + DEFAULT_CHUNK_SIZE])
+
+    suite.run("score.bulk.pipeline", lambda: score_bulk(lambda chunk: score_frame(pipeline, chunk)), rows)
+    if suite.selected("score.bulk.cached"):
+        # Every row already cached, as for an unchanged re-upload
+        cached = CachedScorer(pipeline, PredictionCache(max_rows=len(features)), "bench", features.columns)
+        score_bulk(lambda chunk: score_frame(cached, chunk))
+        suite.run("score.bulk.cached", lambda: score_bulk(lambda chunk: score_frame(cached, chunk)), rows)
+    if suite.selected("explain.bulk.pipeline"):
+        explainer = Explainer(pipeline, features)
+        suite.run("explain.bulk.pipeline", lambda: score_bulk(lambda chunk: top_factors(explainer.explain(chunk))),
+                  rows)
+    preprocessor = pipeline[:-1]
+    for name in MODELS_PATHS:
+        model = read_artifact(MODELS_PATHS[name])
+        if not suite.selected(f"score.bulk.{name}"):
+            continue
+        if not is_fitted(model):
+            suite.record(f"score.bulk.{name}", rows, {"skipped": "artifact is not a fitted estimator"})
+            continue
+        suite.run(f"score.bulk.{name}",
+                  lambda: score_bulk(lambda chunk: model.predict_proba(preprocessor.transform(chunk))), rows)
+    if suite.selected("compare.bulk"):
+        # Every fitted model on one shared preprocessing pass per chunk
+        models, _ = fitted_models(pipeline, {"Pipeline": pipeline.steps[-1][1],
+                                             **{name: read_artifact(path) for name, path in MODELS_PATHS.items()}})
+        suite.run("compare.bulk", lambda: score_bulk(lambda chunk: compare_models(chunk, pipeline, models)), rows)
+
+
+def environment():
+    import sklearn
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": commit,
+            "python": platform.python_version(), "platform": platform.platform(),
+            "cpus": os.cpu_count(), "numpy": np.__version__, "pandas": pd.__version__,
+            "sklearn": sklearn.__version__}
+
+
+def compare(results, baseline, threshold):
+    """Prints median ratios against a baseline run; returns the regressed benchmarks."""
+    before = {(r["name"], r["rows"]): r for r in baseline["results"] if "median" in r}
+    regressions = []
+    print(f"\n{'benchmark':<58}{'before':>11}{'after':>11}{'ratio':>8}")
+    for result in results:
+        key = (result["name"], result["rows"])
+        if "median" not in result or key not in before:
+            continue
+        ratio = result["median"] / before[key]["median"]
+        flag = "  REGRESSION" if ratio > 1 + threshold else ""
+        if flag:
+            regressions.append(key)
+        label = f"{result['name']} [{result['rows']:,}]" if result["rows"] else result["name"]
+        print(f"{label:<58}{before[key]['median'] * 1000:>9.2f}ms{result['median'] * 1000:>9.2f}ms"
+              f"{ratio:>8.2f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load, score and render benchmarks")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help="comma-separated synthetic dataset sizes, e.g. 10k,1m,10m")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--only", action="append", default=[],
+                        help="glob over benchmark names, e.g. 'render.*' (repeatable)")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON results of an earlier run")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="slowdown ratio above 1 + threshold counts as a regression")
+    args = parser.parse_args()
+
+    suite = Suite(args.repeat, args.only)
+    pipeline = run_models(suite)
+    for size in args.sizes.split(","):
+        run_size(suite, parse_size(size), pipeline)
+
+    report = {"environment": environment(), "repeat": args.repeat, "results": suite.results}
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+        file.write("\n")
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(suite.results, json.load(file), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scoring import PIPELINE_PATH, SingleRowScorer, read_artifact  # noqa: E402
+
+# Microbenchmark: single-customer latency of the Predict page's previous path
+# (dict-of-lists DataFrame, then predict and predict_proba) against
+# SingleRowScorer. Run from the repository root:
+#
+#   python benchmarks/single_row.py --iterations 2000
+
+
+def legacy_score(pipeline, record):
+    data = pd.DataFrame({col: [value] for col, value in record.items()})
+    prediction = pipeline.predict(data)[0]
+    probability = pipeline.predict_proba(data)[0][1] * 100
+    return ('Churn' if prediction == 1 else 'Not Churn'), probability
+
+
+def measure(score, records, iterations):
+    """Returns per-call latencies in milliseconds, cycling through records."""
+    for record in records[:20]:  # warm-up
+        score(record)
+    timings = np.empty(iterations)
+    for i in range(iterations):
+        record = records[i % len(records)]
+        start = time.perf_counter()
+        score(record)
+        timings[i] = time.perf_counter() - start
+    return timings * 1000
+
+
+def summarize(timings):
+    return {"p50_ms": float(np.percentile(timings, 50)),
+            "p99_ms": float(np.percentile(timings, 99)),
+            "mean_ms": float(timings.mean())}
+
+
+def run(iterations=1000, dataset="data/train_set.csv", pipeline_path=PIPELINE_PATH):
+    pipeline = read_artifact(pipeline_path)
+    scorer = SingleRowScorer(pipeline)
+    frame = pd.read_csv(dataset)[list(pipeline.feature_names_in_)]
+    records = frame.head(1000).to_dict("records")
+    tuples = list(frame.head(1000).itertuples(index=False, name=None))
+
+    return {
+        "legacy": summarize(measure(lambda r: legacy_score(pipeline, r), records, iterations)),
+        "single_row_dict": summarize(measure(scorer.score, records, iterations)),
+        "single_row_tuple": summarize(measure(scorer.score, tuples, iterations)),
+        "compiled": scorer.compiled,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Single-row scoring latency")
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--dataset", default="data/train_set.csv")
+    parser.add_argument("--pipeline", default=PIPELINE_PATH)
+    args = parser.parse_args()
+
+    results = run(args.iterations, args.dataset, args.pipeline)
+    print(f"SingleRowScorer compiled: {results.pop('compiled')}")
+    print(f"{'path':<18}{'p50 (ms)':>10}{'p99 (ms)':>10}{'mean (ms)':>11}")
+    for name, stats in results.items():
+        print(f"{name:<18}{stats['p50_ms']:>10.3f}{stats['p99_ms']:>10.3f}{stats['mean_ms']:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import argparse
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import zlib
+
+# Multi-worker deployment: starts several Streamlit server processes on
+# consecutive local ports and a small TCP load balancer in front of them.
+# Streamlit keeps each session's state in the process its websocket is
+# connected to, so clients are pinned to a worker by a hash of their IP
+# address; plain TCP forwarding carries the websocket through unchanged.
+# The workers share the cross-process caches configured below.
+#
+#   python cluster.py --workers 4 --port 8501
+#
+# Behind another load balancer (nginx, HAProxy), run only the workers with
+# --no-balancer and give the upstream sticky sessions (e.g. nginx ip_hash).
+
+DEFAULT_WORKERS = os.cpu_count() or 1
+DEFAULT_PORT = 8501
+SHARED_DEFAULTS = {
+    "CHURN_SHARED_CACHE": os.path.join("data", ".cache", "shared.db"),
+    "CHURN_PREDICTION_CACHE_DB": os.path.join("data", ".cache", "predictions.db"),
+    # One scoring process per worker; the workers already spread over the cores
+    "CHURN_SCORING_WORKERS": "1",
+}
+BUFFER_SIZE = 1 << 16
+
+
+def worker_env():
+    env = dict(os.environ)
+    for name, value in SHARED_DEFAULTS.items():
+        env.setdefault(name, value)
+    return env
+
+
+def start_workers(count, first_port, address="127.0.0.1"):
+    env = worker_env()
+    return [subprocess.Popen([sys.executable, "-m", "streamlit", "run", "app.py",
+                              "--server.port", str(first_port + index), "--server.address", address,
+                              "--server.headless", "true"], env=env)
+            for index in range(count)]
+
+
+async def _pipe(reader, writer):
+    try:
+        while data := await reader.read(BUFFER_SIZE):
+            writer.write(data)
+            await writer.drain()
+    except (ConnectionError, asyncio.CancelledError):
+        pass
+    finally:
+        writer.close()
+
+
+def backend_order(client_host, backends):
+    """Backends to try for a client: its pinned worker first, then the rest in turn."""
+    start = zlib.crc32(client_host.encode()) % len(backends)
+    return backends[start:] + backends[:start]
+
+
+async def balance(port, backends, host="0.0.0.0"):
+    async def handle(client_reader, client_writer):
+        client_host = client_writer.get_extra_info("peername")[0]
+        for backend_host, backend_port in backend_order(client_host, backends):
+            try:
+                backend_reader, backend_writer = await asyncio.open_connection(backend_host, backend_port)
+                break
+            except OSError:
+                continue  # worker down or still starting
+        else:
+            client_writer.close()
+            return
+        await asyncio.gather(_pipe(client_reader, backend_writer), _pipe(backend_reader, client_writer))
+
+    server = await asyncio.start_server(handle, host, port)
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run several app workers behind a local load balancer")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="port of the load balancer")
+    parser.add_argument("--worker-port", type=int, help="port of the first worker (default: --port + 1)")
+    parser.add_argument("--no-balancer", action="store_true", help="start only the workers")
+    args = parser.parse_args()
+
+    first_port = args.worker_port or args.port + 1
+    address = "0.0.0.0" if args.no_balancer else "127.0.0.1"
+    workers = start_workers(args.workers, first_port, address)
+    print(f"Started {args.workers} workers on ports {first_port}-{first_port + args.workers - 1}")
+
+    def stop(*_):
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.wait()
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        if args.no_balancer:
+            for worker in workers:
+                worker.wait()
+        else:
+            print(f"Load balancer listening on port {args.port}")
+            backends = [("127.0.0.1", first_port + index) for index in range(args.workers)]
+            asyncio.run(balance(args.port, backends))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator
+from sklearn.metrics import (accuracy_score, average_precision_score, precision_recall_curve, roc_auc_score,
+                             roc_curve)
+from sklearn.utils.validation import check_is_fitted
+
+from retrain import LABEL_COLUMN, labels
+
+# Side-by-side scoring of one batch with several models. The batch goes
+# through the pipeline's preprocessor once and the transformed matrix is
+# handed to every model at the same time from a thread pool; the models
+# only read it, and their predict_proba spends most of its time in NumPy
+# and Cython code that releases the GIL. Free of Streamlit calls, like
+# scoring.py.
+
+TRANSFORM_STEP = "transform"
+CURVE_POINTS = 101
+
+
+def fitted_models(pipeline, candidates):
+    """Splits {name: artifact} into models that can score the pipeline's features and skip reasons."""
+    n_features = len(pipeline[:-1].get_feature_names_out())
+    models, skipped = {}, {}
+    for name, model in candidates.items():
+        if not isinstance(model, BaseEstimator):
+            skipped[name] = "not an estimator; run retrain.py"
+            continue
+        try:
+            check_is_fitted(model)
+        except Exception:
+            skipped[name] = "not fitted; run retrain.py"
+            continue
+        if not hasattr(model, "predict_proba"):
+            skipped[name] = "has no predict_proba"
+            continue
+        if getattr(model, "n_features_in_", n_features) != n_features:
+            skipped[name] = f"fitted on {model.n_features_in_} features, the pipeline produces {n_features}"
+            continue
+        models[name] = model
+    return models, skipped
+
+
+def _churn_probability(model, X):
+    start = time.perf_counter()
+    probability = model.predict_proba(X)[:, list(model.classes_).index(1)]
+    return probability, time.perf_counter() - start
+
+
+class Comparison:
+    """Churn probabilities (%) of every model for one batch, with timings and agreement."""
+
+    def __init__(self, probabilities, timings, y=None):
+        self.probabilities = probabilities
+        self.timings = timings
+        self.y = y
+
+    def predictions(self):
+        # Same threshold as score_frame: churn strictly above 50%
+        return self.probabilities > 50
+
+    def agreement(self):
+        """Share of rows on which each pair of models predicts the same label."""
+        predictions = self.predictions().to_numpy()
+        matches = (predictions[:, :, None] == predictions[:, None, :]).mean(axis=0)
+        return pd.DataFrame(matches, index=self.probabilities.columns, columns=self.probabilities.columns)
+
+    def summary(self):
+        """One row per model: timing, churn rate, mean agreement with the others and, with labels, metrics."""
+        predictions = self.predictions()
+        agreement = self.agreement()
+        rows = []
+        for name in self.probabilities.columns:
+            others = agreement.loc[name].drop(name)
+            row = {"Model": name, "Seconds": self.timings[name],
+                   "Rows/s": len(predictions) / self.timings[name] if self.timings[name] else np.nan,
+                   "Churn rate": predictions[name].mean(),
+                   "Mean agreement": others.mean() if len(others) else 1.0}
+            if self.y is not None:
+                probability = self.probabilities[name].to_numpy() / 100
+                row.update({"ROC AUC": roc_auc_score(self.y, probability),
+                            "Average precision": average_precision_score(self.y, probability),
+                            "Accuracy": accuracy_score(self.y, predictions[name])})
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+    def unanimous(self):
+        """Share of rows on which all models predict the same label."""
+        predictions = self.predictions()
+        return float(predictions.eq(predictions.iloc[:, 0], axis=0).all(axis=1).mean())
+
+    def roc_curves(self, points=CURVE_POINTS):
+        """True positive rate per model on a shared false positive rate grid, for line charts."""
+        grid = np.linspace(0, 1, points)
+        curves = {}
+        for name in self.probabilities.columns:
+            fpr, tpr, _ = roc_curve(self.y, self.probabilities[name])
+            curves[name] = np.interp(grid, fpr, tpr)
+        return pd.DataFrame(curves, index=pd.Index(grid, name="False positive rate"))
+
+    def pr_curves(self, points=CURVE_POINTS):
+        """Precision per model on a shared recall grid, for line charts."""
+        grid = np.linspace(0, 1, points)
+        curves = {}
+        for name in self.probabilities.columns:
+            precision, recall, _ = precision_recall_curve(self.y, self.probabilities[name])
+            # recall comes out decreasing; np.interp needs it increasing
+            curves[name] = np.interp(grid, recall[::-1], precision[::-1])
+        return pd.DataFrame(curves, index=pd.Index(grid, name="Recall"))
+
+
+def compare_models(frame, pipeline, models, workers=None):
+    """Scores frame with every {name: model}, preprocessing it once with the pipeline.
+
+    Models must take the pipeline preprocessor's output (see fitted_models).
+    Labels are read from a Churn column when the frame has a usable one.
+    """
+    start = time.perf_counter()
+    X = pipeline[:-1].transform(frame[list(pipeline.feature_names_in_)])
+    timings = {TRANSFORM_STEP: time.perf_counter() - start}
+
+    with ThreadPoolExecutor(max_workers=workers or len(models) or 1, thread_name_prefix="compare") as executor:
+        futures = {name: executor.submit(_churn_probability, model, X) for name, model in models.items()}
+        results = {name: future.result() for name, future in futures.items()}
+    probabilities = pd.DataFrame({name: probability * 100 for name, (probability, _) in results.items()},
+                                 index=frame.index)
+    timings.update({name: seconds for name, (_, seconds) in results.items()})
+
+    y = None
+    if LABEL_COLUMN in frame.columns:
+        y = labels(frame[LABEL_COLUMN]).to_numpy()
+        # Metrics need every row labelled and both classes present
+        if np.isnan(y).any() or len(np.unique(y)) < 2:
+            y = None
+        else:
+            y = y.astype(int)
+    return Comparison(probabilities, timings, y)
@@ -1,162 +1,332 @@
-import pandas as pd
+import numpy as np
 import streamlit as st
 import matplotlib.pyplot as plt
+from matplotlib.colors import LogNorm
 import seaborn as sns
 import plotly.graph_objects as go
+from aggregates import load_aggregates
+from dataset import dataset_version, load_dataset
+from figures import show_figure
+from filters import column_domains, filter_controls, filters_key, slice_frame
+from instrumentation import span
+import outofcore
+from reduction import (MAX_POINTS, POINT_BUDGETS, SCATTER_MODES, annotate_sampling, binned_2d,
+                       stratified_sample)
 # import plotly.express as px
 # from mpl_toolkits.mplot3d import Axes3D
 
-# Dashboard page
-def dashboard_page():
-    st.title("DASHBOARD SECTION")
-    st.sidebar.title("Dashboard Section")
-    st.sidebar.write('''Visual representation of key performance 
-                     indicators (KPIs), metrics, and data insights, 
-                     displayed in a single, intuitive interface. 
-                     It provides real-time or near-real-time 
-                     information to support informed decision-making
-                     ''')
+# Columns the dashboard can be sliced by; KPIs and charts follow the slice
+SLICE_COLUMNS = ["Contract", "InternetService", "PaymentMethod", "Tenure", "MonthlyCharges"]
 
-    # Load data
-    data = pd.read_csv("data/train_set.csv")
+# Chart builders. Each returns a matplotlib figure and is rendered through the
+# figure cache, so an unchanged chart costs a byte lookup on later reruns.
+# Builders that take max_points draw from a bounded sample of the rows.
 
-     # Calculate KPIs
-    churn_rate = data["Churn"].value_counts(normalize=True)[1] * 100
-    avg_tenure = data["Tenure"].mean()
-    avg_monthly_charges = data["MonthlyCharges"].mean()
-    senior_citizen_ratio = data["SeniorCitizen"].value_counts(normalize=True)[1] * 100
-    gender_balance_male = data["Gender"].value_counts(normalize=True)["Male"] * 100
-    gender_balance_female = data["Gender"].value_counts(normalize=True)["Female"] * 100
+def churn_countplot(aggregates):
+    fig, ax = plt.subplots()
+    counts = aggregates["churn_counts"].sort_index()
+    sns.barplot(x=counts.index.astype(str), y=counts.values, ax=ax, palette="coolwarm")
+    ax.set_title("Churn Distribution", color="darkblue", fontsize=15, weight="bold")
+    ax.set_xlabel("Churn", color="darkblue")
+    ax.set_ylabel("Frequency", color="darkblue")
+    return fig
 
-    # Dashboard
-    st.header("KPI Dashboard")
 
-    # Data Preview
-    st.write("---")
-    st.subheader("Data Preview")
-    st.dataframe(data.head(16))
+def senior_citizen_countplot(aggregates):
+    fig, ax = plt.subplots()
+    counts = aggregates["senior_counts"].sort_index()
+    sns.barplot(x=counts.index.astype(str), y=counts.values, ax=ax, palette="Blues")
+    ax.set_title("Senior Citizen Distribution", color="darkblue", fontsize=15, weight="bold")
+    ax.set_xlabel("Senior Citizen", color="darkblue")
+    ax.set_ylabel("Frequency", color="darkblue")
+    return fig
 
-    # Row 1
-    st.write("---")
-    col1, col2, col3 = st.columns(3)
-    col1.metric("Churn Rate", f"{churn_rate:.2f}%")
-    col2.metric("Average Tenure", f"{avg_tenure:.2f} months")
-    col3.metric("Average Monthly Charges", f"$ {avg_monthly_charges:.2f}")
 
-    # Row 2
-    col4, col5, col6 = st.columns(3)
-    col4.metric("Senior Citizen Ratio", f"{senior_citizen_ratio:.2f}%")
-    col5.metric("Gender Balance (Male)", f"{gender_balance_male:.2f}%")
-    col6.metric("Gender Balance (Female)", f"{gender_balance_female:.2f}%")
+def tenure_histogram(aggregates):
+    fig, ax = plt.subplots()
+    counts, edges = aggregates["tenure_histogram"]
+    ax.bar(edges[:-1], counts, width=np.diff(edges), align="edge", color="skyblue", edgecolor="black")
+    ax.set_title("Tenure Distribution", color="darkblue", fontsize=15, weight="bold")
+    ax.set_xlabel("Tenure", color="darkblue")
+    ax.set_ylabel("Frequency", color="darkblue")
+    return fig
+
+
+def monthly_charges_boxplot(data):
+    fig, ax = plt.subplots()
+    sns.boxplot(x=data["MonthlyCharges"], ax=ax, color="lightgreen")
+    ax.set_title("Monthly Charges Box Plot", color="darkblue", fontsize=15, weight="bold")
+    ax.set_xlabel("Monthly Charges", color="darkblue")
+    return fig
+
+
+def gender_barplot(aggregates):
+    fig, ax = plt.subplots()
+    aggregates["gender_counts"].plot(kind="bar", color=["blue", "orange"], ax=ax)
+    ax.set_title("Gender Distribution", color="darkblue", fontsize=15, weight="bold")
+    ax.set_xlabel("Gender", color="darkblue")
+    ax.set_ylabel("Frequency", color="darkblue")
+    return fig
+
+
+def churn_pieplot(aggregates):
+    fig, ax = plt.subplots()
+    aggregates["churn_counts"].plot(kind="pie", autopct="%1.1f%%", colors=["gold", "lightcoral"], ax=ax)
+    ax.set_title("Churn Distribution", color="darkblue", fontsize=15, weight="bold")
+    return fig
+
+
+def total_charges_kdeplot(aggregates):
+    fig, ax = plt.subplots()
+    grid, density = aggregates["total_charges_kde"]
+    ax.fill_between(grid, density, color="purple", alpha=0.25, linewidth=0)
+    ax.plot(grid, density, color="purple", linewidth=2)
+    ax.set_ylabel("Density")
+    ax.set_title("Total Charges Density", color="darkblue", fontsize=15, weight="bold")
+    ax.set_xlabel("Total Charges", color="darkblue")
+    return fig
+
+
+def charges_bubbleplot(data, mode="Sample", max_points=MAX_POINTS):
+    if mode != "Sample":
+        return _charges_density_plot(data, mode)
+    total = len(data)
+    data = stratified_sample(data, "Churn", max_points)
+    fig, ax = plt.subplots()
+    bubble_plot = ax.scatter(
+        x=data["MonthlyCharges"],
+        y=data["TotalCharges"],
+        s=data["Tenure"] * 10,  # Adjusted size for visualization; change multiplier as needed
+        alpha=0.5,
+        c=data["Tenure"],
+        cmap="viridis",  # Color map for varying colors based on Tenure
+        edgecolor="k"
+    )
+    ax.set_title("Bubble Plot: Monthly Charges vs Total Charges (Bubble Size = Tenure)")
+    ax.set_xlabel("Monthly Charges")
+    ax.set_ylabel("Total Charges")
+    fig.colorbar(bubble_plot, ax=ax, label="Tenure")
+    annotate_sampling(fig, len(data), total)
+    return fig
+
+
+def _charges_density_plot(data, mode):
+    # Binned alternatives to the bubble plot that use every row
+    fig, ax = plt.subplots()
+    if mode == "Hexbin":
+        mesh = ax.hexbin(data["MonthlyCharges"], data["TotalCharges"], C=data["Tenure"],
+                         reduce_C_function=np.mean, gridsize=40, cmap="viridis", mincnt=1)
+        fig.colorbar(mesh, ax=ax, label="Mean Tenure")
+        ax.set_title("Hexbin: Monthly Charges vs Total Charges (Color = Mean Tenure)")
+    else:
+        counts, x_edges, y_edges = binned_2d(data["MonthlyCharges"], data["TotalCharges"])
+        mesh = ax.pcolormesh(x_edges, y_edges, np.ma.masked_equal(counts.T, 0), cmap="viridis",
+                             norm=LogNorm())
+        fig.colorbar(mesh, ax=ax, label="Customers")
+        ax.set_title("2D Histogram: Monthly Charges vs Total Charges")
+    ax.set_xlabel("Monthly Charges")
+    ax.set_ylabel("Total Charges")
+    return fig
+
+
+def tenure_charges_regplot(data, max_points=MAX_POINTS):
+    total = len(data)
+    data = stratified_sample(data, "Churn", max_points)
+    fig, ax = plt.subplots()
+    sns.regplot(x="Tenure", y="MonthlyCharges", data=data, ax=ax, scatter_kws={'color':'skyblue', 's':100}, line_kws={'color':'darkblue', 'linewidth':2})
+    ax.set_title("Regression Plot: Tenure vs Monthly Charges")
+    ax.set_xlabel("Tenure")
+    ax.set_ylabel("Monthly Charges")
+    annotate_sampling(fig, len(data), total)
+    return fig
+
+
+def churn_charges_boxplot(data):
+    fig, ax = plt.subplots()
+    sns.boxplot(x="Churn", y="MonthlyCharges", data=data, ax=ax, palette="Set3")
+    ax.set_title("Box Plot: Churn vs Monthly Charges")
+    return fig
+
+
+def churn_charges_violinplot(data, max_points=MAX_POINTS):
+    total = len(data)
+    data = stratified_sample(data, "Churn", max_points)
+    fig, ax = plt.subplots()
+    sns.violinplot(x="Churn", y="MonthlyCharges", data=data, ax=ax, palette="muted")
+    ax.set_title("Violin Plot: Churn vs Monthly Charges")
+    annotate_sampling(fig, len(data), total)
+    return fig
+
+
+def gender_churn_heatmap(heat_data):
+    fig, ax = plt.subplots()
+    sns.heatmap(heat_data, ax=ax, annot=True, cmap="coolwarm", cbar_kws={'label': 'Count'})
+    ax.set_title("Heatmap: Gender vs Churn")
+    return fig
+
+
+def gender_churn_stacked_bar(stacked_bar_data):
+    fig, ax = plt.subplots()
+    stacked_bar_data.plot(kind="bar", stacked=True, ax=ax, color=['#A8D8EA', '#FFAA4C'])
+    ax.set_title("Stacked Bar Chart: Gender vs Churn")
+    ax.set_xlabel("Gender")
+    ax.set_ylabel("Count")
+    return fig
+
+
+def charges_pairplot(data, max_points=MAX_POINTS):
+    total = len(data)
+    data = stratified_sample(data, "Churn", max_points)
+    pair_plot = sns.pairplot(data[["Tenure", "MonthlyCharges", "TotalCharges"]], diag_kind="kde", kind="scatter", plot_kws={'alpha': 0.7, 's': 50})
+    pair_plot.fig.suptitle("Pair Plot of Tenure, Monthly Charges, and Total Charges", y=1.02)
+    annotate_sampling(pair_plot.fig, len(data), total)
+    return pair_plot.fig
+
+
+def charges_scatter_3d(data, max_points=MAX_POINTS):
+    total = len(data)
+    data = stratified_sample(data, "Churn", max_points)
+    fig = plt.figure(figsize=(10, 7))
+    ax = fig.add_subplot(111, projection='3d')
+    scatter = ax.scatter(data["Tenure"], data["MonthlyCharges"], data["TotalCharges"], c=data["TotalCharges"], cmap="viridis", marker='o', s=50)
+    ax.set_xlabel("Tenure")
+    ax.set_ylabel("Monthly Charges")
+    ax.set_zlabel("Total Charges")
+    fig.colorbar(scatter, ax=ax, label="Total Charges")
+    annotate_sampling(fig, len(data), total)
+    return fig
+
+
+def gender_churn_senior_clustered_bar(clustered_bar):
+    fig, ax = plt.subplots(figsize=(10, 5))
+    clustered_bar.plot(kind="bar", color=['#5A9', '#E33'], ax=ax)
+    ax.set_title("Clustered Bar Chart: Gender, Churn, and Senior Citizen")
+    ax.set_xlabel("Gender")
+    ax.set_ylabel("Count")
+    return fig
+
+
+# Plotly figures are cached per dataset version; the leading underscore keeps
+# Streamlit from hashing the frame itself
+@st.cache_data(max_entries=4, show_spinner=False)
+def sankey_figure(version, _aggregates):
+    aggregates = _aggregates
+    # Flows come from the crosstabs: Gender -> Churn, then Churn -> Senior Citizen
+    gender_churn = aggregates["gender_churn"]
+    churn_senior = aggregates["gender_churn_senior"].sum().unstack("SeniorCitizen", fill_value=0)
+    # One node per value in the data, so 0/1 or unexpected categories work too
+    stages = [("Gender", "Gender", gender_churn.index),
+              ("Churn", "Churn", gender_churn.columns.union(churn_senior.index, sort=False)),
+              ("SeniorCitizen", "Senior Citizen", churn_senior.columns)]
+    node_index, labels = {}, []
+    for column, title, values in stages:
+        for node_value in values:
+            node_index[(column, node_value)] = len(labels)
+            labels.append(f"{title}: {node_value}")
+    palette = ["#636EFA", "#EF553B", "#00CC96", "#AB63FA", "#FFA15A", "#19D3F3"]
+    source, target, value = [], [], []
+    for left, right, table in [("Gender", "Churn", gender_churn), ("Churn", "SeniorCitizen", churn_senior)]:
+        for row in table.index:
+            for column in table.columns:
+                source.append(node_index[(left, row)])
+                target.append(node_index[(right, column)])
+                value.append(int(table.loc[row, column]))
+    fig = go.Figure(data=[go.Sankey(
+        node=dict(
+            pad=15, thickness=20, line=dict(color="black", width=0.5),
+            label=labels,
+            color=[palette[index % len(palette)] for index in range(len(labels))]
+        ),
+        link=dict(source=source, target=target, value=value)
+    )])
+    fig.update_layout(title_text="Sankey Diagram: Gender, Churn, and Senior Citizen", font_size=10)
+    return fig
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def radial_figure(version, _aggregates):
+    # One point per tenure month (mean charges) instead of one per customer
+    radial_data = _aggregates["monthly_by_tenure"]
+    fig = go.Figure(data=go.Scatterpolar(
+        r=radial_data.values, theta=radial_data.index, fill='toself', name="Customers",
+        marker=dict(color="lightseagreen")
+    ))
+    fig.update_layout(
+        polar=dict(radialaxis=dict(visible=True, range=[0, radial_data.max()])),
+        title="Radial Plot: Monthly Charges by Tenure"
+    )
+    return fig
+
+
+@st.fragment
+def univariate_section(data, version, aggregates):
+    """Distributions of single columns; shown by default."""
+    if not st.toggle("Show univariate analysis", value=True, key="show_univariate_section"):
+        return
 
-    # Plots
-    st.write("---")
     st.header("UNIVARIATE ANALYSIS")
     st.subheader("Distributions")
 
 
 
-    # Set a general aesthetic theme for all plots
-    sns.set(style="whitegrid", palette="pastel")
+    # All charts share the whitegrid/pastel theme unless noted otherwise
 
     # Subheading for Churn Analysis
     st.subheader("Churn Distribution")
     col1, col2 = st.columns(2)
     with col1:
-        fig, ax = plt.subplots()
-        sns.countplot(x="Churn", data=data, ax=ax, palette="coolwarm")
-        ax.set_title("Churn Distribution", color="darkblue", fontsize=15, weight="bold")
-        ax.set_xlabel("Churn", color="darkblue")
-        ax.set_ylabel("Frequency", color="darkblue")
-        st.pyplot(fig)
+        show_figure("churn_countplot", version, lambda: churn_countplot(aggregates))
 
     with col2:
         # Subheading for Senior Citizen Distribution
         st.subheader("Senior Citizen Distribution")
-        fig, ax = plt.subplots()
-        sns.countplot(x="SeniorCitizen", data=data, ax=ax, palette="Blues")
-        ax.set_title("Senior Citizen Distribution", color="darkblue", fontsize=15, weight="bold")
-        ax.set_xlabel("Senior Citizen", color="darkblue")
-        ax.set_ylabel("Frequency", color="darkblue")
-        st.pyplot(fig)
+        show_figure("senior_citizen_countplot", version, lambda: senior_citizen_countplot(aggregates))
 
     # Subheading for Tenure Distribution
     st.subheader("Tenure Distribution")
     col3, col4 = st.columns(2)
     with col3:
-        fig, ax = plt.subplots()
-        sns.histplot(data["Tenure"], ax=ax, bins=10, color="skyblue", edgecolor="black")
-        ax.set_title("Tenure Distribution", color="darkblue", fontsize=15, weight="bold")
-        ax.set_xlabel("Tenure", color="darkblue")
-        ax.set_ylabel("Frequency", color="darkblue")
-        st.pyplot(fig)
+        show_figure("tenure_histogram", version, lambda: tenure_histogram(aggregates))
 
     with col4:
         # Subheading for Monthly Charges Analysis
         st.subheader("Monthly Charges Distribution")
-        fig, ax = plt.subplots()
-        sns.boxplot(x=data["MonthlyCharges"], ax=ax, color="lightgreen")
-        ax.set_title("Monthly Charges Box Plot", color="darkblue", fontsize=15, weight="bold")
-        ax.set_xlabel("Monthly Charges", color="darkblue")
-        st.pyplot(fig)
+        show_figure("monthly_charges_boxplot", version, lambda: monthly_charges_boxplot(data))
 
     # Subheading for Gender and Churn Distribution
     st.subheader("Demographics")
     col7, col8 = st.columns(2)
     with col7:
-        fig, ax = plt.subplots()
-        data["Gender"].value_counts().plot(kind="bar", color=["blue", "orange"], ax=ax)
-        ax.set_title("Gender Distribution", color="darkblue", fontsize=15, weight="bold")
-        ax.set_xlabel("Gender", color="darkblue")
-        ax.set_ylabel("Frequency", color="darkblue")
-        st.pyplot(fig)
+        show_figure("gender_barplot", version, lambda: gender_barplot(aggregates))
 
     with col8:
-        fig, ax = plt.subplots()
-        data["Churn"].value_counts().plot(kind="pie", autopct="%1.1f%%", colors=["gold", "lightcoral"], ax=ax)
-        ax.set_title("Churn Distribution", color="darkblue", fontsize=15, weight="bold")
-        st.pyplot(fig)
+        show_figure("churn_pieplot", version, lambda: churn_pieplot(aggregates))
 
 
     # Subheading for Total Charges Density
     st.subheader("Total Charges Distribution")
-    fig, ax = plt.subplots()
-    sns.kdeplot(data["TotalCharges"], ax=ax, color="purple", shade=True, linewidth=2)
-    ax.set_title("Total Charges Density", color="darkblue", fontsize=15, weight="bold")
-    ax.set_xlabel("Total Charges", color="darkblue")
-    st.pyplot(fig)
+    show_figure("total_charges_kdeplot", version, lambda: total_charges_kdeplot(aggregates))
 
-    
 
-# Sample data (replace with your own DataFrame)
-    data = pd.DataFrame({
-    'Tenure': [10, 20, 30, 40, 50],
-    'MonthlyCharges': [70, 80, 90, 100, 110],
-    'TotalCharges': [700, 1600, 2700, 4000, 5500],
-    'Gender': ['Male', 'Female', 'Male', 'Female', 'Male'],
-    'Churn': [1, 0, 1, 0, 1],
-    'SeniorCitizen': [0, 1, 0, 1, 0]
-    })
+@st.fragment
+def bivariate_section(data, version, aggregates):
+    """Pairwise relationships, drawn from a bounded sample of the rows."""
+    if not st.toggle("Show bivariate analysis", value=False, key="show_bivariate_section"):
+        return
 
     st.title("BIVARIATE ANALYSIS")
 
+    # Scatter-style charts draw from a bounded sample of the full dataset
+    col1, col2 = st.columns(2)
+    scatter_mode = col1.radio("Scatter rendering", SCATTER_MODES, horizontal=True,
+                              key="bivariate_scatter_mode")
+    max_points = col2.select_slider("Max points per chart", POINT_BUDGETS, value=MAX_POINTS,
+                                    key="bivariate_max_points")
+
         # Bubble Plot - Monthly Charges vs Total Charges with Tenure as Bubble Size
     st.subheader("Monthly Charges vs Total Charges (Bubble Plot with Tenure)")
-    fig, ax = plt.subplots()
-    bubble_plot = ax.scatter(
-        x=data["MonthlyCharges"],
-        y=data["TotalCharges"],
-        s=data["Tenure"] * 10,  # Adjusted size for visualization; change multiplier as needed
-        alpha=0.5,
-        c=data["Tenure"],
-        cmap="viridis",  # Color map for varying colors based on Tenure
-        edgecolor="k"
-    )
-    ax.set_title("Bubble Plot: Monthly Charges vs Total Charges (Bubble Size = Tenure)")
-    ax.set_xlabel("Monthly Charges")
-    ax.set_ylabel("Total Charges")
-    fig.colorbar(bubble_plot, ax=ax, label="Tenure")
-    st.pyplot(fig)
+    show_figure(f"charges_bubbleplot:{scatter_mode}:{max_points}", version,
+                lambda: charges_bubbleplot(data, scatter_mode, max_points))
     st.markdown("""
     **Interpretation:** This bubble plot shows the relationship between 'Monthly Charges' and 'Total Charges' with bubble size representing 'Tenure'.
     - **Observations**: Larger bubbles indicate customers with longer tenure. This plot helps identify if customers with higher monthly charges tend to accumulate larger total charges, and how tenure influences this.
@@ -164,12 +334,8 @@ def dashboard_page():
 
     # Regression Plot - Tenure vs Monthly Charges
     st.subheader("Tenure vs Monthly Charges Regression")
-    fig, ax = plt.subplots()
-    sns.regplot(x="Tenure", y="MonthlyCharges", data=data, ax=ax, scatter_kws={'color':'skyblue', 's':100}, line_kws={'color':'darkblue', 'linewidth':2})
-    ax.set_title("Regression Plot: Tenure vs Monthly Charges")
-    ax.set_xlabel("Tenure")
-    ax.set_ylabel("Monthly Charges")
-    st.pyplot(fig)
+    show_figure(f"tenure_charges_regplot:{max_points}", version,
+                lambda: tenure_charges_regplot(data, max_points))
     st.markdown("""
     **Interpretation:** The regression plot shows the trend line for 'Tenure' and 'Monthly Charges'.
     - **Observations**: A positive slope suggests that monthly charges increase with tenure.
@@ -177,10 +343,7 @@ def dashboard_page():
 
     # Box Plot - Churn vs Monthly Charges
     st.subheader("Churn vs Monthly Charges")
-    fig, ax = plt.subplots()
-    sns.boxplot(x="Churn", y="MonthlyCharges", data=data, ax=ax, palette="Set3")
-    ax.set_title("Box Plot: Churn vs Monthly Charges")
-    st.pyplot(fig)
+    show_figure("churn_charges_boxplot", version, lambda: churn_charges_boxplot(data))
     st.markdown("""
     **Interpretation:** This box plot shows the distribution of 'Monthly Charges' within churn categories.
     - **Observations**: Compare the range and median of monthly charges for customers who churned vs those who didn’t.
@@ -188,10 +351,8 @@ def dashboard_page():
 
     # Violin Plot - Churn vs Monthly Charges
     st.subheader("Churn vs Monthly Charges")
-    fig, ax = plt.subplots()
-    sns.violinplot(x="Churn", y="MonthlyCharges", data=data, ax=ax, palette="muted")
-    ax.set_title("Violin Plot: Churn vs Monthly Charges")
-    st.pyplot(fig)
+    show_figure(f"churn_charges_violinplot:{max_points}", version,
+                lambda: churn_charges_violinplot(data, max_points))
     st.markdown("""
     **Interpretation:** The violin plot provides a detailed view of 'Monthly Charges' distributions for each churn status.
     - **Observations**: Look for any skewness or multimodal distributions within each churn group.
@@ -199,11 +360,8 @@ def dashboard_page():
 
     # Heatmap - Gender vs Churn
     st.subheader("Gender vs Churn Heatmap")
-    fig, ax = plt.subplots()
-    heat_data = pd.crosstab(data["Gender"], data["Churn"])
-    sns.heatmap(heat_data, ax=ax, annot=True, cmap="coolwarm", cbar_kws={'label': 'Count'})
-    ax.set_title("Heatmap: Gender vs Churn")
-    st.pyplot(fig)
+    heat_data = aggregates["gender_churn"]
+    show_figure("gender_churn_heatmap", version, lambda: gender_churn_heatmap(heat_data))
     st.markdown("""
     **Interpretation:** The heatmap shows the counts of churn by gender.
     - **Observations**: Use this to see if churn rates differ significantly between genders.
@@ -211,36 +369,29 @@ def dashboard_page():
 
     # Stacked Bar Chart - Gender vs Churn
     st.subheader("Gender vs Churn Stacked Bar Chart")
-    fig, ax = plt.subplots()
-    stacked_bar_data = pd.crosstab(data["Gender"], data["Churn"])
-    stacked_bar_data.plot(kind="bar", stacked=True, ax=ax, color=['#A8D8EA', '#FFAA4C'])
-    ax.set_title("Stacked Bar Chart: Gender vs Churn")
-    ax.set_xlabel("Gender")
-    ax.set_ylabel("Count")
-    st.pyplot(fig)
+    stacked_bar_data = aggregates["gender_churn"]
+    show_figure("gender_churn_stacked_bar", version, lambda: gender_churn_stacked_bar(stacked_bar_data))
     st.markdown("""
     **Interpretation:** The stacked bar chart shows the distribution of churn within each gender.
     - **Observations**: Identify if one gender has a higher churn rate than the other.
     """)
 
 
+@st.fragment
+def multivariate_section(data, version, aggregates):
+    """Interactions between three or more variables, including the Plotly charts."""
+    if not st.toggle("Show multivariate analysis", value=False, key="show_multivariate_section"):
+        return
+
     st.title("MULTIVARIATE ANALYSIS")  
-    # Sample data (replace with your own DataFrame)
-    data = pd.DataFrame({
-        'Tenure': [10, 20, 30, 40, 50],
-        'MonthlyCharges': [70, 80, 90, 100, 110],
-        'TotalCharges': [700, 1600, 2700, 4000, 5500],
-        'Gender': ['Male', 'Female', 'Male', 'Female', 'Male'],
-        'Churn': [1, 0, 1, 0, 1],
-        'SeniorCitizen': [0, 1, 0, 1, 0]
-    })
+
+    max_points = st.select_slider("Max points per chart", POINT_BUDGETS, value=MAX_POINTS,
+                                  key="multivariate_max_points")
 
     # Pair Plot of Numerical Variables
     st.subheader("Pair Plot of Numerical Variables")
-    sns.set_palette("Set2")  # Set color palette
-    pair_plot = sns.pairplot(data[["Tenure", "MonthlyCharges", "TotalCharges"]], diag_kind="kde", kind="scatter", plot_kws={'alpha': 0.7, 's': 50})
-    pair_plot.fig.suptitle("Pair Plot of Tenure, Monthly Charges, and Total Charges", y=1.02)
-    st.pyplot(pair_plot.fig)
+    show_figure(f"charges_pairplot:{max_points}", version,
+                lambda: charges_pairplot(data, max_points), theme=("whitegrid", "Set2"))
 
     st.markdown("""
     **Interpretation:** This pair plot allows us to observe the relationships between 'Tenure', 'Monthly Charges', and 'Total Charges'. 
@@ -250,14 +401,8 @@ def dashboard_page():
 
     # 3D Scatter Plot of Numerical Variables
     st.subheader("3D Scatter Plot of Numerical Variables")
-    fig = plt.figure(figsize=(10, 7))
-    ax = fig.add_subplot(111, projection='3d')
-    scatter = ax.scatter(data["Tenure"], data["MonthlyCharges"], data["TotalCharges"], c=data["TotalCharges"], cmap="viridis", marker='o', s=50)
-    ax.set_xlabel("Tenure")
-    ax.set_ylabel("Monthly Charges")
-    ax.set_zlabel("Total Charges")
-    fig.colorbar(scatter, ax=ax, label="Total Charges")
-    st.pyplot(fig)
+    show_figure(f"charges_scatter_3d:{max_points}", version,
+                lambda: charges_scatter_3d(data, max_points), theme=("whitegrid", "Set2"))
 
     st.markdown("""
     **Interpretation:** This 3D scatter plot shows the interaction between 'Tenure', 'Monthly Charges', and 'Total Charges'.
@@ -267,13 +412,8 @@ def dashboard_page():
 
     # Clustered Bar Chart of Categorical Variables
     st.subheader("Clustered Bar Chart of Categorical Variables")
-    fig, ax = plt.subplots(figsize=(10, 5))
-    clustered_bar = pd.crosstab(data["Gender"], [data["Churn"], data["SeniorCitizen"]])
-    clustered_bar.plot(kind="bar", color=['#5A9', '#E33'], ax=ax)
-    ax.set_title("Clustered Bar Chart: Gender, Churn, and Senior Citizen")
-    ax.set_xlabel("Gender")
-    ax.set_ylabel("Count")
-    st.pyplot(fig)
+    clustered_bar = aggregates["gender_churn_senior"]
+    show_figure("gender_churn_senior_clustered_bar", version, lambda: gender_churn_senior_clustered_bar(clustered_bar), theme=("whitegrid", "Set2"))
 
     st.markdown("""
     **Interpretation:** This clustered bar chart allows us to examine the distribution of 'Churn' and 'Senior Citizen' status within each gender.
@@ -282,16 +422,8 @@ def dashboard_page():
 
     # Sankey Diagram of Categorical Variables
     st.subheader("Sankey Diagram of Categorical Variables")
-    fig = go.Figure(data=[go.Sankey(
-        node=dict(
-            pad=15, thickness=20, line=dict(color="black", width=0.5),
-            label=["Gender: Male", "Gender: Female", "Churn: Yes", "Churn: No", "Senior Citizen: Yes", "Senior Citizen: No"],
-            color=["#636EFA", "#EF553B", "#00CC96", "#AB63FA", "#FFA15A", "#19D3F3"]
-        ),
-        link=dict(source=[0, 1, 2, 3, 4], target=[2, 3, 4, 5, 3], value=[8, 4, 2, 3, 5])
-    )])
-    fig.update_layout(title_text="Sankey Diagram: Gender, Churn, and Senior Citizen", font_size=10)
-    st.plotly_chart(fig)
+    with span("render.sankey"):
+        st.plotly_chart(sankey_figure(version, aggregates))
 
     st.markdown("""
     **Interpretation:** This Sankey diagram visualizes flows between categories of gender, churn, and senior citizen status.
@@ -313,15 +445,8 @@ def dashboard_page():
 
     # Radial Plot of Mixed Variables
     st.subheader("Radial Plot of Mixed Variables")
-    fig = go.Figure(data=go.Scatterpolar(
-        r=data["MonthlyCharges"], theta=data["Tenure"], fill='toself', name="Customers",
-        marker=dict(color="lightseagreen")
-    ))
-    fig.update_layout(
-        polar=dict(radialaxis=dict(visible=True, range=[0, data["MonthlyCharges"].max()])),
-        title="Radial Plot: Monthly Charges by Tenure"
-    )
-    st.plotly_chart(fig)
+    with span("render.radial"):
+        st.plotly_chart(radial_figure(version, aggregates))
 
     st.markdown("""
     **Interpretation:** This radial plot provides a circular representation of 'Monthly Charges' relative to 'Tenure'.
@@ -329,4 +454,84 @@ def dashboard_page():
     """)
 
 
+# Dashboard page
+def dashboard_page():
+    st.title("DASHBOARD SECTION")
+    st.sidebar.title("Dashboard Section")
+    st.sidebar.write('''Visual representation of key performance 
+                     indicators (KPIs), metrics, and data insights, 
+                     displayed in a single, intuitive interface. 
+                     It provides real-time or near-real-time 
+                     information to support informed decision-making
+                     ''')
+
+    # Load data: the shared in-memory frame, or the partitioned dataset out of core
+    out_of_core = outofcore.enabled()
+    with span("load.dataset"):
+        if out_of_core:
+            version = outofcore.dataset_dir_version()
+            domains = outofcore.scan_domains(outofcore.DATASET_DIR, version, SLICE_COLUMNS)
+        else:
+            data = load_dataset()
+            version = dataset_version()
+            domains = column_domains(data, version, SLICE_COLUMNS)
+
+    # Optional slice, answered from the filter engine's indexes or pushed down into the scan
+    with st.sidebar.expander("Slice customers"):
+        filters = filter_controls(domains, key="dashboard")
+
+    # KPIs and crosstabs come precomputed per dataset version and slice
+    with span("load.aggregates"):
+        if out_of_core:
+            aggregates = outofcore.scan_aggregates(outofcore.DATASET_DIR, version, filters)
+            # Charts of individual customers draw from a bounded sample
+            data = outofcore.scan_sample(outofcore.DATASET_DIR, version, filters)
+        else:
+            data = slice_frame(version, filters, data)
+            aggregates = load_aggregates(filters=filters) if len(data) else None
+    if filters:
+        st.sidebar.caption(f"{aggregates['rows'] if aggregates else 0:,} customers in the slice")
+        # Charts of a slice are cached separately from the full dataset's
+        version = f"{version}:{filters_key(filters)}"
+    if aggregates is None:
+        st.warning("No customers match the selected slice.")
+        return
+
+    churn_rate = aggregates["churn_rate"]
+    avg_tenure = aggregates["avg_tenure"]
+    avg_monthly_charges = aggregates["avg_monthly_charges"]
+    senior_citizen_ratio = aggregates["senior_citizen_ratio"]
+    gender_balance_male = aggregates["gender_balance"].get("Male", 0)
+    gender_balance_female = aggregates["gender_balance"].get("Female", 0)
+
+    # Dashboard
+    st.header("KPI Dashboard")
+
+    # Data Preview
+    st.write("---")
+    st.subheader("Data Preview")
+    st.dataframe(data.head(16))
+    if out_of_core:
+        st.caption(f"Out-of-core mode: KPIs and distributions cover all {aggregates['rows']:,} customers; "
+                   f"charts of individual customers use a sample of {len(data):,}.")
 
+    # Row 1
+    st.write("---")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Churn Rate", f"{churn_rate:.2f}%")
+    col2.metric("Average Tenure", f"{avg_tenure:.2f} months")
+    col3.metric("Average Monthly Charges", f"$ {avg_monthly_charges:.2f}")
+
+    # Row 2
+    col4, col5, col6 = st.columns(3)
+    col4.metric("Senior Citizen Ratio", f"{senior_citizen_ratio:.2f}%")
+    col5.metric("Gender Balance (Male)", f"{gender_balance_male:.2f}%")
+    col6.metric("Gender Balance (Female)", f"{gender_balance_female:.2f}%")
+
+    # Plots. Each section is a fragment that renders only when switched on, so
+    # the KPI row above never waits on the heavy charts and a widget inside one
+    # section reruns that section alone.
+    st.write("---")
+    univariate_section(data, version, aggregates)
+    bivariate_section(data, version, aggregates)
+    multivariate_section(data, version, aggregates)
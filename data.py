@@ -1,5 +1,10 @@
 import streamlit as st
-import pandas as pd
+from pandas.api.types import is_numeric_dtype
+from dataset import DATASET_PATH, dataset_version, load_dataset
+from instrumentation import span
+import outofcore
+from paging import paged_dataframe, paged_dataset
+from summary_stats import load_summary
 
 def data_page():
     # Page title and sidebar introduction
@@ -35,12 +40,20 @@ def data_page():
         "Churn": "Whether the customer churned (Yes, No)"
     }
 
-    # Load dataset (add correct path to your CSV file)
-    dataset_path = "data/train_set.csv"
+    # Load dataset from the shared cache, or open the partitioned dataset out of core
+    out_of_core = outofcore.enabled()
     try:
-        data = pd.read_csv(dataset_path)
+        with span("load.dataset"):
+            if out_of_core:
+                version = outofcore.dataset_dir_version()
+                all_columns, numeric_columns = outofcore.schema_columns(outofcore.DATASET_DIR, version)
+            else:
+                data = load_dataset()
+                version = dataset_version()
+                all_columns = list(data.columns)
+                numeric_columns = [column for column, dtype in data.dtypes.items() if is_numeric_dtype(dtype)]
     except FileNotFoundError:
-        st.error(f"Dataset not found at path: {dataset_path}")
+        st.error(f"Dataset not found at path: {outofcore.DATASET_DIR if out_of_core else DATASET_PATH}")
         return
     
     # Column selection for descriptions and data filtering
@@ -58,21 +71,33 @@ def data_page():
         # Filter and display data based on type selection
         data_type = st.selectbox("Select Data Type to Display", ["All", "Numerical", "Categorical"])
         
-        if data_type == "Numerical":
-            filtered_data = data.select_dtypes(include=["number"])
-        elif data_type == "Categorical":
-            filtered_data = data.select_dtypes(include=["object", "category"])
-        else:
-            filtered_data = data
+        # Only the column list is selected here; rows are paged server side
+        with span("transform.filter"):
+            if data_type == "Numerical":
+                filtered_columns = numeric_columns
+            elif data_type == "Categorical":
+                filtered_columns = [column for column in all_columns if column not in numeric_columns]
+            else:
+                filtered_columns = all_columns
 
-        st.write("### Filtered Data")
-        st.write(filtered_data)
+    st.write("### Filtered Data")
+    if out_of_core:
+        paged_dataset(outofcore.DATASET_DIR, version, key="filtered_data", columns=filtered_columns)
+    else:
+        paged_dataframe(data, version, key="filtered_data", columns=filtered_columns)
     
     # Display full dataset in an expandable section
     with st.expander("View Full Dataset"):
-        st.dataframe(data)
+        if out_of_core:
+            paged_dataset(outofcore.DATASET_DIR, version, key="full_dataset")
+        else:
+            paged_dataframe(data, version, key="full_dataset", filterable=False)
 
     # Summary statistics for quick insights
     st.write("### Dataset Summary")
-    st.write(data.describe(include="all"))
+    with span("transform.describe"):
+        summary = (outofcore.scan_summary(outofcore.DATASET_DIR, version) if out_of_core
+                   else load_summary())
+    with span("render.summary"):
+        st.write(summary)
 
@@ -0,0 +1,113 @@
+import hashlib
+import json
+import os
+import threading
+
+import pandas as pd
+import pyarrow.parquet as pq
+import streamlit as st
+
+# Shared access to the training dataset used by the Data and Dashboard pages.
+# The CSV is parsed once into a typed Parquet copy under data/.cache, which is
+# rebuilt only when the CSV changes, and the loaded frame is shared by every
+# session of the process.
+DATASET_PATH = os.path.join("data", "train_set.csv")
+CACHE_DIR = os.path.join("data", ".cache")
+
+NUMERICAL_COLUMNS = ["Tenure", "MonthlyCharges", "TotalCharges"]
+CATEGORICAL_COLUMNS = [
+    "Gender", "SeniorCitizen", "Partner", "Dependents", "PhoneService",
+    "MultipleLines", "InternetService", "OnlineSecurity", "OnlineBackup",
+    "DeviceProtection", "TechSupport", "StreamingTV", "StreamingMovies",
+    "Contract", "PaperlessBilling", "PaymentMethod", "Churn"
+]
+
+_build_lock = threading.Lock()
+
+
+def _cache_paths(path):
+    name = os.path.splitext(os.path.basename(path))[0]
+    return (os.path.join(CACHE_DIR, f"{name}.parquet"),
+            os.path.join(CACHE_DIR, f"{name}.json"))
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_meta(meta_path):
+    try:
+        with open(meta_path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_atomic(path, write):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _dump_json(obj, path):
+    with open(path, "w") as file:
+        json.dump(obj, file)
+
+
+def read_csv_typed(source, **kwargs):
+    """Reads a dataset CSV with numeric and categorical dtypes applied."""
+    data = pd.read_csv(source, **kwargs)
+    for column in NUMERICAL_COLUMNS:
+        if column in data.columns:
+            data[column] = pd.to_numeric(data[column], errors="coerce")
+    for column in CATEGORICAL_COLUMNS:
+        if column in data.columns:
+            data[column] = data[column].astype("category")
+    return data
+
+
+def _ensure_parquet(path):
+    """Builds the Parquet copy of the CSV if it is missing or stale."""
+    parquet_path, meta_path = _cache_paths(path)
+    stat = os.stat(path)  # raises FileNotFoundError for a missing dataset
+    meta = _read_meta(meta_path)
+    fresh = os.path.exists(parquet_path)
+
+    # Same size and mtime: trust the cached copy without rehashing the CSV
+    if fresh and meta.get("size") == stat.st_size and meta.get("mtime_ns") == stat.st_mtime_ns:
+        return parquet_path, meta["sha256"]
+
+    sha256 = _file_sha256(path)
+    if not (fresh and meta.get("sha256") == sha256):
+        data = read_csv_typed(path)
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        _write_atomic(parquet_path, lambda tmp: data.to_parquet(tmp, index=False))
+
+    # Touched but unchanged files only refresh the recorded mtime
+    meta = {"source": path, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": sha256}
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    _write_atomic(meta_path, lambda tmp: _dump_json(meta, tmp))
+    return parquet_path, sha256
+
+
+def dataset_version(path=DATASET_PATH):
+    """Returns a short content hash identifying the current dataset version."""
+    with _build_lock:
+        return _ensure_parquet(path)[1][:16]
+
+
+# Keyed by version so a changed CSV is picked up on the next rerun
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _load_parquet(parquet_path, version):
+    return pq.read_table(parquet_path, memory_map=True).to_pandas()
+
+
+def load_dataset(path=DATASET_PATH):
+    """Returns the shared, typed dataset frame. Callers must not mutate it."""
+    with _build_lock:
+        parquet_path, sha256 = _ensure_parquet(path)
+    return _load_parquet(parquet_path, sha256[:16])
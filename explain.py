@@ -0,0 +1,160 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import GradientBoostingClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder
+
+# Per-row feature contributions for a preprocessor + classifier pipeline,
+# computed for whole batches with matrix products. Contributions are summed
+# from the transformed features back onto the input columns, so a one-hot
+# encoded column gets one number per row, and for every row
+#
+#   base + contributions.sum(axis=1) == the classifier's output
+#
+# where the output is the churn log-odds for linear models and gradient
+# boosting, and the churn probability for random forests and single trees.
+#
+# Linear models are explained exactly, as coef * (x - mean of x over a
+# background set). Tree models use path attribution: each split on a
+# decision path is credited with the change in node value it causes. The
+# credits along the path to every node are summed once per explainer, so a
+# batch needs only each row's leaf in each tree (tree.apply) and a gather.
+
+TOP_FACTORS = 3
+
+
+def _output_groups(preprocessor, columns):
+    """Returns, per transformed feature, the position of the input column it came from."""
+    position = {col: index for index, col in enumerate(columns)}
+    groups = []
+    for _, transformer, cols in preprocessor.transformers_:
+        if transformer == "drop" or len(cols) == 0:
+            continue
+        encoder = transformer.steps[-1][1] if isinstance(transformer, Pipeline) else transformer
+        if isinstance(encoder, OneHotEncoder):
+            for index, (col, categories) in enumerate(zip(cols, encoder.categories_)):
+                dropped = encoder.drop_idx_ is not None and encoder.drop_idx_[index] is not None
+                groups.extend([position[col]] * (len(categories) - dropped))
+        else:
+            # Scalers and other element-wise transformers keep one output per column
+            groups.extend(position[col] for col in cols)
+    return np.asarray(groups)
+
+
+class Explainer:
+    """Batch feature contributions for a fitted pipeline whose last step is the classifier."""
+
+    def __init__(self, pipeline, background):
+        self.pipeline = pipeline
+        self.preprocessor = pipeline[:-1]
+        self.classifier = pipeline.steps[-1][1]
+        self.columns = list(pipeline.feature_names_in_)
+        step = self.preprocessor.steps[-1][1] if isinstance(self.preprocessor, Pipeline) else self.preprocessor
+        if isinstance(step, ColumnTransformer):
+            groups = _output_groups(step, self.columns)
+        else:
+            groups = np.arange(len(self.columns))
+        # Transformed feature -> input column, as positions and as a 0/1 matrix
+        self._groups = groups
+        self._grouping = np.eye(len(self.columns))[groups]
+
+        if isinstance(self.classifier, LogisticRegression) or hasattr(self.classifier, "coef_"):
+            self.kind = "linear"
+            self.units = "log-odds"
+            self._coef = np.ravel(self.classifier.coef_)
+            self._mean = np.asarray(self._transform(background[self.columns]).mean(axis=0)).ravel()
+        elif hasattr(self.classifier, "estimators_") or hasattr(self.classifier, "tree_"):
+            self.kind = "tree"
+            self.units = "log-odds" if isinstance(self.classifier, GradientBoostingClassifier) else "probability"
+            self._trees, self._offsets, self._path_credits = self._tree_credits()
+        else:
+            raise TypeError(f"Cannot explain {type(self.classifier).__name__} models")
+
+    def _transform(self, frame):
+        transformed = self.preprocessor.transform(frame)
+        return transformed.toarray() if sparse.issparse(transformed) else np.asarray(transformed, dtype=float)
+
+    def _tree_credits(self):
+        """(trees, node offsets, per-node credit summed along the path from the root, scaled)."""
+        if isinstance(self.classifier, GradientBoostingClassifier):
+            if self.classifier.estimators_.shape[1] != 1:
+                raise TypeError("Only binary gradient boosting models can be explained")
+            trees = list(self.classifier.estimators_[:, 0])
+            scale = self.classifier.learning_rate
+        elif hasattr(self.classifier, "estimators_"):
+            trees = list(self.classifier.estimators_)
+            scale = 1 / len(trees)
+        else:
+            trees, scale = [self.classifier], 1.0
+        path_credits = []
+        for tree in trees:
+            structure = tree.tree_
+            values = structure.value[:, 0, :]
+            # Churn probability for classifiers, the raw score for boosting stages
+            values = values[:, 1] / values.sum(axis=1) if values.shape[1] > 1 else values[:, 0]
+            internal = np.flatnonzero(structure.children_left >= 0)
+            parents = np.full(structure.node_count, -1)
+            parents[structure.children_left[internal]] = internal
+            parents[structure.children_right[internal]] = internal
+            # A split credits its feature with the change in value it leads to
+            children = np.flatnonzero(parents >= 0)
+            credit = np.zeros((structure.node_count, len(self.columns)))
+            np.add.at(credit, (children, self._groups[structure.feature[parents[children]]]),
+                      scale * (values[children] - values[parents[children]]))
+            # Sum the credits top-down, one depth level at a time
+            depth = np.zeros(structure.node_count, dtype=int)
+            for node in internal:  # parents come before their children
+                depth[structure.children_left[node]] = depth[structure.children_right[node]] = depth[node] + 1
+            for level in range(1, depth.max() + 1):
+                nodes = np.flatnonzero(depth == level)
+                credit[nodes] += credit[parents[nodes]]
+            path_credits.append(credit)
+        offsets = np.cumsum([0] + [credit.shape[0] for credit in path_credits[:-1]])
+        return trees, offsets, np.vstack(path_credits)
+
+    def _raw_output(self, transformed):
+        if isinstance(self.classifier, GradientBoostingClassifier) or self.kind == "linear":
+            return self.classifier.decision_function(transformed)
+        return self.classifier.predict_proba(transformed)[:, 1]
+
+    def contributions(self, frame):
+        """Returns (base, contributions) with one column per input column, in self.columns order."""
+        transformed = self._transform(frame[self.columns])
+        if self.kind == "linear":
+            contributions = ((transformed - self._mean) * self._coef) @ self._grouping
+        else:
+            # Leaf of every row in every tree, then its path credit, summed over the trees
+            if len(self._trees) == 1:
+                leaves = self._trees[0].apply(transformed.astype(np.float32))[:, None]
+            else:
+                leaves = np.column_stack([tree.apply(transformed.astype(np.float32)) for tree in self._trees])
+            contributions = np.zeros((len(transformed), len(self.columns)))
+            for index in range(leaves.shape[1]):
+                contributions += self._path_credits[leaves[:, index] + self._offsets[index]]
+        # Whatever the attribution leaves unexplained is the same for every row, so one row gives it
+        base = float(self._raw_output(transformed[:1])[0] - contributions[0].sum()) if len(transformed) else 0.0
+        return base, contributions
+
+    def explain(self, frame):
+        """Per-row contributions as a DataFrame aligned with frame."""
+        _, contributions = self.contributions(frame)
+        return pd.DataFrame(contributions, index=frame.index, columns=self.columns)
+
+
+def top_factors(explanations, k=TOP_FACTORS):
+    """The k columns pushing each row most towards churn, e.g. "Contract, Tenure, TechSupport"."""
+    values = explanations.to_numpy()
+    k = min(k, values.shape[1])
+    top = np.argsort(-values, axis=1)[:, :k]
+    names = np.asarray(explanations.columns, dtype=object)[top]
+    # Columns that lower the churn risk are not risk factors
+    names[np.take_along_axis(values, top, axis=1) <= 0] = ""
+    return pd.Series([", ".join(name for name in row if name) for row in names], index=explanations.index)
+
+
+def importance(explanations):
+    """Mean absolute contribution per column, largest first."""
+    return explanations.abs().mean().sort_values(ascending=False)
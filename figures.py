@@ -0,0 +1,68 @@
+import io
+import os
+import threading
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import seaborn as sns
+import streamlit as st
+from cachetools import LRUCache
+from instrumentation import span
+from shared_cache import cache_key, get_or_compute
+
+# Rendered-figure cache for the dashboard. Charts are rendered once per
+# (chart id, dataset version, theme) to PNG or SVG bytes, the figure is closed
+# straight away, and later reruns only look the bytes up.
+DEFAULT_THEME = ("whitegrid", "pastel")
+CACHE_BYTES = int(os.environ.get("CHURN_FIGURE_CACHE_MB", 64)) * 1024 * 1024
+
+_cache = LRUCache(maxsize=CACHE_BYTES, getsizeof=len)
+_cache_lock = threading.Lock()
+# pyplot keeps global state, so renders from concurrent sessions are serialised
+_render_lock = threading.Lock()
+
+
+def render_figure(build, theme=DEFAULT_THEME, fmt="png"):
+    """Builds a figure under the given (style, palette) theme and returns its bytes."""
+    style, palette = theme
+    with _render_lock, sns.plotting_context("notebook"), sns.axes_style(style), \
+            sns.color_palette(palette):
+        fig = build()
+        try:
+            buffer = io.BytesIO()
+            # Same options st.pyplot uses, so cached charts look identical
+            fig.savefig(buffer, format=fmt, bbox_inches="tight", dpi=200)
+            return buffer.getvalue()
+        finally:
+            plt.close(fig)
+
+
+def cached_figure(chart_id, version, build, theme=DEFAULT_THEME, fmt="png"):
+    """Returns the rendered bytes for a chart, rendering only on a cache miss."""
+    key = (chart_id, version, theme, fmt)
+    with _cache_lock:
+        image = _cache.get(key)
+    if image is None:
+        # Another worker process may already have rendered it
+        image = get_or_compute("figure", cache_key(*key), lambda: render_figure(build, theme, fmt))
+        # LRUCache refuses values larger than the whole cache, e.g. with CHURN_FIGURE_CACHE_MB=0
+        if len(image) <= _cache.maxsize:
+            with _cache_lock:
+                _cache[key] = image
+    return image
+
+
+def show_figure(chart_id, version, build, theme=DEFAULT_THEME, fmt="png"):
+    """Displays a cached chart in place of st.pyplot(build())."""
+    with span(f"render.{chart_id}"):
+        image = cached_figure(chart_id, version, build, theme, fmt)
+        if fmt == "svg":
+            image = image.decode("utf-8")
+        st.image(image, use_column_width=True)
+
+
+def cache_info():
+    """Returns the number of cached charts and the bytes they hold."""
+    with _cache_lock:
+        return {"charts": len(_cache), "bytes": _cache.currsize, "max_bytes": _cache.maxsize}
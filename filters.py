@@ -0,0 +1,141 @@
+import hashlib
+import threading
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Filter engine over the shared dataset frame. Per dataset version it keeps a
+# packed bitmap per value of each categorical column and a sorted index per
+# numeric column, so a combined predicate is answered with bitwise ANDs of
+# bitmaps and binary searches instead of scans over the rows.
+#
+# Filters are a tuple of (column, condition) pairs: a tuple of allowed
+# values for categorical columns, a (low, high) inclusive range for numeric
+# ones. Conditions on different columns are ANDed, values within one ORed.
+
+
+def is_numeric(values):
+    return pd.api.types.is_numeric_dtype(values.dtype) and not isinstance(values.dtype, pd.CategoricalDtype)
+
+
+def _sort_keys(values):
+    """Numeric keys whose ascending order is the column's order, missing values as NaN."""
+    if is_numeric(values):
+        return values.to_numpy(dtype=float, na_value=np.nan)
+    codes, _ = pd.factorize(values, sort=True)
+    keys = codes.astype(float)
+    keys[codes < 0] = np.nan
+    return keys
+
+
+# Indexes are shared by every session and rebuilt only for a new dataset version
+@st.cache_resource(max_entries=64, show_spinner=False)
+def sort_index(version, column, ascending, _data):
+    """Returns (order, sorted_keys): a stable row order for the column, missing values last."""
+    keys = _sort_keys(_data[column])
+    order = np.argsort(keys if ascending else -keys, kind="stable")
+    return order, keys[order]
+
+
+class FilterIndex:
+    """Bitmap and sorted indexes over one dataset version, built per column on first use."""
+
+    def __init__(self, data, version):
+        self.data = data
+        self.version = version
+        self.rows = len(data)
+        self._bitmaps = {}  # column -> {value: packed bitmap}
+        self._lock = threading.Lock()
+
+    def bitmaps(self, column):
+        with self._lock:
+            if column not in self._bitmaps:
+                codes, uniques = pd.factorize(self.data[column])
+                self._bitmaps[column] = {value: np.packbits(codes == code)
+                                         for code, value in enumerate(uniques)}
+            return self._bitmaps[column]
+
+    def _range_bitmap(self, column, low, high):
+        order, keys = sort_index(self.version, column, True, self.data)
+        start = np.searchsorted(keys, low, side="left")
+        stop = np.searchsorted(keys, high, side="right")
+        mask = np.zeros(self.rows, dtype=bool)
+        mask[order[start:stop]] = True
+        return np.packbits(mask)
+
+    def _bitmap(self, column, condition):
+        if is_numeric(self.data[column]):
+            return self._range_bitmap(column, *condition)
+        bitmaps = self.bitmaps(column)
+        selected = [bitmaps[value] for value in condition if value in bitmaps]
+        if not selected:
+            return np.zeros((self.rows + 7) // 8, dtype=np.uint8)
+        return np.bitwise_or.reduce(selected)
+
+    def mask(self, filters):
+        """Boolean row mask of the rows matching every filter."""
+        bitmap = None
+        for column, condition in filters:
+            current = self._bitmap(column, condition)
+            bitmap = current if bitmap is None else bitmap & current
+        if bitmap is None:
+            return np.ones(self.rows, dtype=bool)
+        return np.unpackbits(bitmap, count=self.rows).astype(bool)
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def filter_index(version, _data):
+    return FilterIndex(_data, version)
+
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def filter_rows(version, filters, _data):
+    """Positions of the rows matching the filters, in row order."""
+    return np.flatnonzero(filter_index(version, _data).mask(filters))
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def slice_frame(version, filters, _data):
+    """The rows matching the filters as a frame; the frame itself when unfiltered."""
+    if not filters:
+        return _data
+    return _data.iloc[filter_rows(version, filters, _data)]
+
+
+def filters_key(filters):
+    """Short stable id of a filter combination, for cache keys of sliced views."""
+    if not filters:
+        return ""
+    return hashlib.sha256(repr(filters).encode()).hexdigest()[:12]
+
+
+def column_domains(data, version, columns):
+    """Returns {column: (low, high)} for numeric columns and {column: [values]} otherwise."""
+    domains = {}
+    for column in columns:
+        values = data[column]
+        if is_numeric(values):
+            _, keys = sort_index(version, column, True, data)
+            finite = keys[~np.isnan(keys)]
+            if len(finite):
+                domains[column] = (float(finite[0]), float(finite[-1]))
+        else:
+            domains[column] = (list(values.cat.categories) if isinstance(values.dtype, pd.CategoricalDtype)
+                               else sorted(values.dropna().unique()))
+    return domains
+
+
+def filter_controls(domains, key):
+    """Renders one widget per column domain and returns the filters the user chose."""
+    filters = []
+    for column, domain in domains.items():
+        if isinstance(domain, tuple):
+            selected = st.slider(column, domain[0], domain[1], domain, key=f"{key}_filter_{column}")
+            if selected != domain:
+                filters.append((column, selected))
+        else:
+            selected = st.multiselect(column, domain, key=f"{key}_filter_{column}")
+            if selected:
+                filters.append((column, tuple(selected)))
+    return tuple(filters)
@@ -0,0 +1,122 @@
+import contextlib
+import json
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+
+import streamlit as st
+
+# Timing spans around the load, transform, score and render steps of each
+# rerun. Off unless CHURN_PROFILE=1, in which case span() costs one global
+# check. With CHURN_PROFILE_MEMORY=1 each span also records the change in
+# traced Python memory. Every finished rerun is appended as one JSON line to
+# CHURN_PROFILE_LOG and shown to admins in a sidebar panel.
+ENABLED = os.environ.get("CHURN_PROFILE", "") not in ("", "0")
+TRACE_MEMORY = ENABLED and os.environ.get("CHURN_PROFILE_MEMORY", "") not in ("", "0")
+LOG_PATH = os.environ.get("CHURN_PROFILE_LOG", os.path.join("logs", "timings.jsonl"))
+ADMIN_USERS = {"admin"}
+
+_NULL_SPAN = contextlib.nullcontext()
+# Streamlit runs each session's script on its own thread
+_local = threading.local()
+_log_lock = threading.Lock()
+
+
+def _traced_memory():
+    return tracemalloc.get_traced_memory()[0] if TRACE_MEMORY else 0
+
+
+class _Span:
+    __slots__ = ("name", "start", "memory", "record", "owns_run")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        # A span outside any run, such as a fragment rerun, becomes its own run
+        self.owns_run = getattr(_local, "run", None) is None
+        if self.owns_run:
+            _start_run(self.name)
+        run = _local.run
+        self.record = {"name": self.name, "depth": run["depth"], "ms": None}
+        run["spans"].append(self.record)
+        run["depth"] += 1
+        self.memory = _traced_memory()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.record["ms"] = (time.perf_counter() - self.start) * 1000
+        if TRACE_MEMORY:
+            self.record["mem_kb"] = (_traced_memory() - self.memory) / 1024
+        _local.run["depth"] -= 1
+        if self.owns_run:
+            _finish_run()
+        return False
+
+
+def span(name):
+    """Times the enclosed block as one step of the current rerun."""
+    if not ENABLED:
+        return _NULL_SPAN
+    return _Span(name)
+
+
+def _start_run(scope):
+    if TRACE_MEMORY and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _local.run = {"run": uuid.uuid4().hex[:12], "scope": scope,
+                  "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                  "started": time.perf_counter(), "depth": 0, "spans": []}
+
+
+def _finish_run():
+    run = _local.run
+    _local.run = None
+    run["total_ms"] = (time.perf_counter() - run.pop("started")) * 1000
+    del run["depth"]
+    _write_log(run)
+    return run
+
+
+def _write_log(run):
+    try:
+        directory = os.path.dirname(LOG_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with _log_lock, open(LOG_PATH, "a") as file:
+            file.write(json.dumps(run) + "\n")
+    except OSError:
+        pass  # timings must never break a page
+
+
+@contextlib.contextmanager
+def profiled_run(scope):
+    """Collects the spans of one app rerun and logs them when it finishes."""
+    if not ENABLED:
+        yield
+        return
+    _start_run(scope)
+    try:
+        yield
+    finally:
+        st.session_state["last_timings"] = _finish_run()
+
+
+def is_admin():
+    return st.session_state.get("username") in ADMIN_USERS
+
+
+def show_timings_panel():
+    """Sidebar table of the last finished rerun's spans, for admins only."""
+    run = st.session_state.get("last_timings")
+    if not ENABLED or run is None or not is_admin():
+        return
+    with st.sidebar.expander("Timings"):
+        st.write(f"**{run['scope']}**: {run['total_ms']:.1f} ms")
+        # Plain records rather than a DataFrame, so the login page never imports pandas
+        st.dataframe([{"name": "\u2003" * record["depth"] + record["name"],
+                       **{key: value for key, value in record.items() if key not in ("name", "depth")}}
+                      for record in run["spans"]], hide_index=True)
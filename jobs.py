@@ -0,0 +1,188 @@
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from scoring import DEFAULT_CHUNK_SIZE, stream_bulk_predictions
+
+# Background bulk-scoring jobs. An upload is copied into its own job
+# directory under data/jobs and scored there by a small thread pool, so the
+# Streamlit session that submitted it is free again at once and concurrent
+# jobs never share output files. Each job's status is kept in memory and
+# mirrored to status.json, so users can come back to finished jobs from a
+# new session, and jobs left running by a process that has since exited
+# show up as interrupted. Free of Streamlit calls, like scoring.py.
+
+JOBS_DIR = os.path.join("data", "jobs")
+UPLOAD_FILE = "upload.csv"
+RESULT_FILE = "predictions.csv"
+QUARANTINE_FILE = "quarantine.csv"
+STATUS_FILE = "status.json"
+JOB_TTL_DAYS = 7
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED, INTERRUPTED = (
+    "queued", "running", "done", "failed", "cancelled", "interrupted")
+ACTIVE_STATES = (QUEUED, RUNNING)
+
+
+def default_job_workers():
+    """Concurrent background jobs, from CHURN_JOB_WORKERS (default 2)."""
+    return int(os.environ.get("CHURN_JOB_WORKERS", 0)) or 2
+
+
+def _process_alive(pid):
+    if not pid or pid == os.getpid():
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    """One bulk-scoring job and its files."""
+
+    def __init__(self, directory, status):
+        self.directory = directory
+        self.status = status
+        self.cancel_event = threading.Event()
+        self.future = None
+
+    @property
+    def id(self):
+        return self.status["id"]
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def save(self):
+        tmp_path = f"{self.path(STATUS_FILE)}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(self.status, file)
+        os.replace(tmp_path, self.path(STATUS_FILE))
+
+    def update(self, **fields):
+        self.status.update(fields)
+        self.save()
+
+
+class JobManager:
+    """Thread pool running bulk-scoring jobs, with status, progress and cancellation."""
+
+    def __init__(self, jobs_dir=JOBS_DIR, workers=None, ttl_days=JOB_TTL_DAYS):
+        self.jobs_dir = jobs_dir
+        self.workers = workers or default_job_workers()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bulk-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+        os.makedirs(jobs_dir, exist_ok=True)
+        self._load(ttl_days)
+
+    def _load(self, ttl_days):
+        """Picks up jobs of earlier processes and removes expired ones."""
+        expiry = time.time() - ttl_days * 86400
+        for job_id in os.listdir(self.jobs_dir):
+            directory = os.path.join(self.jobs_dir, job_id)
+            try:
+                with open(os.path.join(directory, STATUS_FILE)) as file:
+                    status = json.load(file)
+            except (OSError, ValueError):
+                continue
+            if status["created"] < expiry:
+                shutil.rmtree(directory, ignore_errors=True)
+                continue
+            if status["state"] in ACTIVE_STATES and _process_alive(status.get("pid")):
+                continue  # queued or running in another worker process
+            job = Job(directory, status)
+            if status["state"] in ACTIVE_STATES:
+                job.update(state=INTERRUPTED, finished=time.time())
+            self._jobs[job_id] = job
+
+    def submit(self, upload, name, owner, pipeline, schema, chunksize=DEFAULT_CHUNK_SIZE):
+        """Copies the upload (a binary file object) into a new job and queues it. Returns the job id."""
+        job_id = uuid.uuid4().hex[:12]
+        directory = os.path.join(self.jobs_dir, job_id)
+        os.makedirs(directory)
+        with open(os.path.join(directory, UPLOAD_FILE), "wb") as file:
+            shutil.copyfileobj(upload, file, 1 << 20)
+        job = Job(directory, {"id": job_id, "name": name, "owner": owner, "pid": os.getpid(),
+                              "state": QUEUED, "created": time.time(), "started": None, "finished": None,
+                              "progress": 0.0, "rows_done": 0, "rows_quarantined": 0, "error": None})
+        job.save()
+        with self._lock:
+            self._jobs[job_id] = job
+            job.future = self._executor.submit(self._run, job, pipeline, schema, chunksize)
+        return job_id
+
+    def _run(self, job, pipeline, schema, chunksize):
+        if job.cancel_event.is_set():
+            job.update(state=CANCELLED, finished=time.time())
+            return
+        job.update(state=RUNNING, started=time.time())
+        try:
+            with open(job.path(UPLOAD_FILE), "rb") as upload:
+                size = max(os.fstat(upload.fileno()).st_size, 1)
+
+                def report_progress(chunk, rows_done):
+                    if job.cancel_event.is_set():
+                        raise JobCancelled()
+                    job.update(progress=min(upload.tell() / size, 1.0), rows_done=rows_done)
+
+                rows_done, rows_quarantined = stream_bulk_predictions(
+                    upload, pipeline, job.path(RESULT_FILE), job.path(QUARANTINE_FILE), schema,
+                    chunksize=chunksize, on_chunk=report_progress)
+            job.update(state=DONE, progress=1.0, rows_done=rows_done,
+                       rows_quarantined=rows_quarantined, finished=time.time())
+        except JobCancelled:
+            job.update(state=CANCELLED, finished=time.time())
+        except Exception as e:
+            job.update(state=FAILED, error=str(e) or type(e).__name__, finished=time.time())
+
+    def cancel(self, job_id):
+        """Cancels a queued or running job; a running one stops after its current chunk."""
+        job = self._jobs.get(job_id)
+        if job is None or job.status["state"] not in ACTIVE_STATES:
+            return False
+        job.cancel_event.set()
+        if job.future is not None and job.future.cancel():
+            job.update(state=CANCELLED, finished=time.time())
+        return True
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def status(self, job_id):
+        job = self._jobs.get(job_id)
+        return dict(job.status) if job is not None else None
+
+    def list(self, owner=None):
+        """Statuses of the owner's jobs (all jobs if owner is None), newest first."""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        statuses = [dict(job.status) for job in jobs if owner is None or job.status["owner"] == owner]
+        return sorted(statuses, key=lambda status: status["created"], reverse=True)
+
+    def remove(self, job_id):
+        """Deletes a finished job and its files."""
+        job = self._jobs.get(job_id)
+        if job is None or job.status["state"] in ACTIVE_STATES:
+            return False
+        with self._lock:
+            del self._jobs[job_id]
+        shutil.rmtree(job.directory, ignore_errors=True)
+        return True
+
+    def shutdown(self):
+        for job in list(self._jobs.values()):
+            job.cancel_event.set()
+        self._executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,247 @@
+import argparse
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import streamlit as st
+from aggregates import GROUP_COLUMNS, TENURE_BINS, combine_totals, group_totals, summarize_totals, tenure_totals
+from dataset import DATASET_PATH, NUMERICAL_COLUMNS
+from reduction import KDE_GRID_SIZE, kde_from_counts, kde_support
+from shared_cache import cache_key, get_or_compute
+from summary_stats import DatasetSummary, NumericSummary
+
+# Out-of-core mode for the Data and Dashboard pages. When CHURN_DATASET_DIR
+# points at a hive-partitioned Parquet dataset, the pages never load it into
+# one DataFrame: record batches are scanned with column projection and
+# predicate pushdown, KPIs, crosstabs, histograms and the KDE are streaming
+# aggregations, scatter-style charts draw from a bounded sample, and the Data
+# page reads only the rows of the visible page.
+#
+#   python outofcore.py build data/train_set.csv data/customers --partition-by Contract
+#   CHURN_DATASET_DIR=data/customers streamlit run app.py
+DATASET_DIR = os.environ.get("CHURN_DATASET_DIR", "")
+BATCH_ROWS = 1 << 18
+SAMPLE_ROWS = 100_000
+SAMPLE_COLUMNS = ["Churn", "Tenure", "MonthlyCharges", "TotalCharges"]
+
+
+def enabled():
+    return bool(DATASET_DIR)
+
+
+def dataset_dir_version(path=DATASET_DIR):
+    """Short hash of the dataset's Parquet file names, sizes and mtimes."""
+    entries = []
+    for root, _, files in os.walk(path):
+        for name in files:
+            if name.endswith(".parquet"):
+                file_path = os.path.join(root, name)
+                stat = os.stat(file_path)
+                entries.append(f"{os.path.relpath(file_path, path)}:{stat.st_size}:{stat.st_mtime_ns}")
+    if not entries:
+        raise FileNotFoundError(f"No Parquet files under {path}")
+    return hashlib.sha256("\n".join(sorted(entries)).encode()).hexdigest()[:16]
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def open_dataset(path, version):
+    return ds.dataset(path, format="parquet", partitioning="hive")
+
+
+def is_numeric_field(field):
+    return pa.types.is_integer(field.type) or pa.types.is_floating(field.type)
+
+
+def filter_expression(schema, filters):
+    """Translates filter-engine filters into a pyarrow expression for pushdown."""
+    expression = None
+    for column, condition in filters:
+        field = pc.field(column)
+        if is_numeric_field(schema.field(column)):
+            low, high = condition
+            current = (field >= low) & (field <= high)
+        else:
+            current = field.isin(list(condition))
+        expression = current if expression is None else expression & current
+    return expression
+
+
+def scan(path, version, columns, filters=()):
+    """Yields the matching rows batch by batch as small DataFrames."""
+    dataset = open_dataset(path, version)
+    for batch in dataset.to_batches(columns=columns, filter=filter_expression(dataset.schema, filters),
+                                    batch_size=BATCH_ROWS):
+        if batch.num_rows:
+            yield batch.to_pandas()
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def scan_aggregates(path, version, filters=()):
+    """Dashboard aggregates in two streaming passes; None when no rows match."""
+    return get_or_compute("scan_aggregates", cache_key(path, version, filters),
+                          lambda: _scan_aggregates(path, version, filters))
+
+
+def _scan_aggregates(path, version, filters=()):
+    columns = GROUP_COLUMNS + NUMERICAL_COLUMNS
+    grouped, tenure = [], []
+    tenure_stats, charges_stats = NumericSummary(), NumericSummary()
+    for frame in scan(path, version, columns, filters):
+        grouped.append(group_totals(frame))
+        tenure.append(tenure_totals(frame))
+        tenure_stats.update(frame["Tenure"])
+        charges_stats.update(frame["TotalCharges"])
+    if not grouped:
+        return None
+
+    # Second pass: histogram counts over ranges known from the first
+    tenure_range = (tenure_stats.min, tenure_stats.max)
+    tenure_counts = np.zeros(TENURE_BINS, dtype=np.int64)
+    support = kde_support(charges_stats.count, charges_stats.std(), charges_stats.min, charges_stats.max)
+    kde_counts = np.zeros(KDE_GRID_SIZE, dtype=np.int64)
+    for frame in scan(path, version, ["Tenure", "TotalCharges"], filters):
+        values = frame["Tenure"].dropna().to_numpy(dtype=float)
+        tenure_counts += np.histogram(values, bins=TENURE_BINS, range=tenure_range)[0]
+        if support is not None:
+            values = frame["TotalCharges"].dropna().to_numpy(dtype=float)
+            kde_counts += np.histogram(values, bins=KDE_GRID_SIZE, range=support[1:])[0]
+
+    tenure_edges = np.histogram_bin_edges([], bins=TENURE_BINS, range=tenure_range)
+    if support is None:
+        kde = (np.array([]), np.array([]))
+    else:
+        kde_edges = np.histogram_bin_edges([], bins=KDE_GRID_SIZE, range=support[1:])
+        kde = kde_from_counts(kde_counts, kde_edges, charges_stats.count, support[0])
+    return summarize_totals(combine_totals(grouped), combine_totals(tenure),
+                            (tenure_counts, tenure_edges), kde)
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def scan_sample(path, version, filters=(), rows=SAMPLE_ROWS, seed=0):
+    """A uniform sample of at most ~rows matching rows, for scatter-style charts."""
+    dataset = open_dataset(path, version)
+    total = dataset.count_rows(filter=filter_expression(dataset.schema, filters))
+    fraction = min(1.0, rows / max(total, 1))
+    parts = [frame.sample(frac=fraction, random_state=seed + i) if fraction < 1 else frame
+             for i, frame in enumerate(scan(path, version, SAMPLE_COLUMNS, filters))]
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=SAMPLE_COLUMNS)
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def scan_domains(path, version, columns):
+    """Filter-control domains: (min, max) of numeric columns, sorted values of the rest."""
+    return get_or_compute("scan_domains", cache_key(path, version, tuple(columns)),
+                          lambda: _scan_domains(path, version, columns))
+
+
+def _scan_domains(path, version, columns):
+    dataset = open_dataset(path, version)
+    numeric = [column for column in columns if is_numeric_field(dataset.schema.field(column))]
+    ranges = {column: NumericSummary() for column in numeric}
+    values = {column: set() for column in columns if column not in ranges}
+    for batch in dataset.to_batches(columns=list(columns), batch_size=BATCH_ROWS):
+        for column in numeric:
+            extremes = pc.min_max(batch.column(column)).as_py()
+            if extremes["min"] is not None:
+                ranges[column].update([extremes["min"], extremes["max"]])
+        for column in values:
+            values[column].update(value for value in pc.unique(batch.column(column)).to_pylist()
+                                  if value is not None)
+    domains = {column: (float(stats.min), float(stats.max)) for column, stats in ranges.items() if stats.count}
+    domains.update({column: sorted(found) for column, found in values.items()})
+    return {column: domains[column] for column in columns if column in domains}
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def scan_summary(path, version):
+    """The Data page summary table, built batch by batch from mergeable summaries."""
+    return get_or_compute("scan_summary", cache_key(path, version), lambda: _scan_summary(path, version))
+
+
+def _scan_summary(path, version):
+    summary = DatasetSummary()
+    for frame in scan(path, version, None):
+        summary.update(frame)
+    return summary.to_frame()
+
+
+def schema_columns(path, version):
+    """Returns (all columns, numeric columns) of the dataset."""
+    schema = open_dataset(path, version).schema
+    return schema.names, [field.name for field in schema if is_numeric_field(field)]
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def row_group_index(path, version):
+    """Returns ([(fragment, row group id)] in dataset order, cumulative row counts from 0).
+
+    Built from the Parquet footers only, once per dataset version.
+    """
+    row_groups, counts = [], [0]
+    for fragment in open_dataset(path, version).get_fragments():
+        for row_group in fragment.row_groups:
+            row_groups.append((fragment, row_group.id))
+            counts.append(row_group.num_rows)
+    return row_groups, np.cumsum(counts)
+
+
+def read_page(path, version, columns, start, stop):
+    """Reads rows [start, stop) of the dataset, in dataset order.
+
+    Only the row groups covering the range are read, so every page costs the
+    same however deep into the dataset it is.
+    """
+    dataset = open_dataset(path, version)
+    row_groups, offsets = row_group_index(path, version)
+    start, stop = max(start, 0), min(stop, offsets[-1])
+    if start >= stop:
+        return dataset.schema.empty_table().select(list(columns)).to_pandas()
+    first = np.searchsorted(offsets, start, side="right") - 1
+    last = np.searchsorted(offsets, stop, side="left")
+    # Consecutive row groups of one file are read together
+    tables, index = [], first
+    while index < last:
+        fragment, ids = row_groups[index][0], []
+        while index < last and row_groups[index][0] is fragment:
+            ids.append(row_groups[index][1])
+            index += 1
+        tables.append(fragment.subset(row_group_ids=ids).to_table(schema=dataset.schema, columns=list(columns)))
+    table = pa.concat_tables(tables)
+    return table.slice(start - offsets[first], stop - start).to_pandas()
+
+
+def count_rows(path, version):
+    return open_dataset(path, version).count_rows()
+
+
+def build_dataset(source, target, partition_by=(), chunksize=1_000_000):
+    """Converts a CSV into a hive-partitioned Parquet dataset, chunk by chunk."""
+    for index, chunk in enumerate(pd.read_csv(source, chunksize=chunksize)):
+        # Categorical columns stay plain strings so every chunk's files share one schema
+        for column in NUMERICAL_COLUMNS:
+            chunk[column] = pd.to_numeric(chunk[column], errors="coerce")
+        ds.write_dataset(pa.Table.from_pandas(chunk, preserve_index=False), target, format="parquet",
+                         partitioning=list(partition_by), partitioning_flavor="hive",
+                         basename_template=f"part-{index:05d}-{{i}}.parquet",
+                         existing_data_behavior="overwrite_or_ignore")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Out-of-core Parquet dataset tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build = subparsers.add_parser("build", help="convert a CSV into a partitioned Parquet dataset")
+    build.add_argument("source", nargs="?", default=DATASET_PATH)
+    build.add_argument("target")
+    build.add_argument("--partition-by", action="append", default=[])
+    build.add_argument("--chunksize", type=int, default=1_000_000)
+    args = parser.parse_args()
+    build_dataset(args.source, args.target, args.partition_by, args.chunksize)
+    print(f"Wrote {args.target} (version {dataset_dir_version(args.target)})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import streamlit as st
+from filters import column_domains, filter_controls, filter_index, filter_rows, sort_index
+from instrumentation import span
+import outofcore
+
+# Server-side paged viewer for large frames. Sorting and column filters are
+# answered from the filter engine's indexes, built once per dataset version,
+# and only the rows of the visible page are sent to the browser.
+PAGE_SIZES = [25, 50, 100, 250, 500]
+DEFAULT_PAGE_SIZE = 50
+NO_SORT = "(row order)"
+
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def row_order(version, sort_column, ascending, filters, _data):
+    """Row positions to page through, or None for the frame's own order."""
+    order = sort_index(version, sort_column, ascending, _data)[0] if sort_column else None
+    if not filters:
+        return order
+    if order is None:
+        return filter_rows(version, filters, _data)
+    keep = filter_index(version, _data).mask(filters)
+    return order[keep[order]]
+
+
+def _column_filters(data, version, columns, key):
+    with st.expander("Column filters"):
+        chosen = st.multiselect("Filter on", columns, key=f"{key}_filter_columns")
+        return filter_controls(column_domains(data, version, chosen), key)
+
+
+def paged_dataframe(data, version, key, columns=None, filterable=True):
+    """Shows one page of data[columns], sorted and filtered server side.
+
+    Pass filterable=False inside an expander, since the filters use one.
+    """
+    columns = list(data.columns if columns is None else columns)
+    col1, col2, col3 = st.columns([3, 1, 1])
+    sort_column = col1.selectbox("Sort by", [NO_SORT] + columns, key=f"{key}_sort")
+    descending = col2.toggle("Descending", key=f"{key}_descending")
+    page_size = col3.selectbox("Rows per page", PAGE_SIZES, index=PAGE_SIZES.index(DEFAULT_PAGE_SIZE),
+                               key=f"{key}_page_size")
+    filters = _column_filters(data, version, columns, key) if filterable else ()
+
+    with span("transform.page"):
+        sort_column = None if sort_column == NO_SORT else sort_column
+        order = row_order(version, sort_column, not descending, filters, data)
+        total = len(data) if order is None else len(order)
+        pages = max(1, -(-total // page_size))
+        page = min(int(st.number_input("Page", min_value=1, value=1, key=f"{key}_page")), pages)
+        start = (page - 1) * page_size
+        stop = min(start + page_size, total)
+        rows = slice(start, stop) if order is None else order[start:stop]
+        page_data = data.iloc[rows][columns]
+
+    st.caption(f"Page {page:,} of {pages:,} · rows {start + 1 if total else 0:,}–{stop:,} of {total:,}")
+    with span("render.page"):
+        st.dataframe(page_data)
+
+
+def paged_dataset(path, version, key, columns=None):
+    """Shows one page of an out-of-core dataset, reading only that page's rows.
+
+    Rows stay in dataset order; sorting and column filters need the in-memory frame.
+    """
+    col1, col2 = st.columns([4, 1])
+    page_size = col2.selectbox("Rows per page", PAGE_SIZES, index=PAGE_SIZES.index(DEFAULT_PAGE_SIZE),
+                               key=f"{key}_page_size")
+    with span("transform.page"):
+        total = outofcore.count_rows(path, version)
+        pages = max(1, -(-total // page_size))
+        page = min(int(col1.number_input("Page", min_value=1, value=1, key=f"{key}_page")), pages)
+        start = (page - 1) * page_size
+        stop = min(start + page_size, total)
+        page_data = outofcore.read_page(path, version, columns or outofcore.schema_columns(path, version)[0],
+                                        start, stop)
+
+    st.caption(f"Page {page:,} of {pages:,} · rows {start + 1 if total else 0:,}–{stop:,} of {total:,}"
+               " · sorting and column filters are off in out-of-core mode")
+    with span("render.page"):
+        st.dataframe(page_data)
@@ -1,38 +1,255 @@
+import atexit
+import threading
+
 import streamlit as st
-import pickle
 import pandas as pd
-import os
+import outofcore
+from dataset import load_dataset
+from registry import MODELS_PATHS, PIPELINE_NAME, ModelRegistry, default_warmup
+from scoring import (DEFAULT_CHUNK_SIZE, PIPELINE_PATH, ScoringEngine, SingleRowScorer,
+                     add_predictions, default_workers, score_frame, stream_bulk_predictions)
+from instrumentation import span
+from jobs import ACTIVE_STATES, DONE, QUARANTINE_FILE, RESULT_FILE, JobManager
+from prediction_cache import CachedScorer, PredictionCache, default_db_path
+from validation import UploadSchema
+from explain import Explainer, importance, top_factors
+from compare import TRANSFORM_STEP, compare_models, fitted_models
+
+EXPLAIN_BACKGROUND_ROWS = 10_000
 
-# Load the pipeline (pipelist.pkl) directly
+# Process-wide model registry; artifacts load lazily and are evicted LRU
+# under the CHURN_MODEL_MEMORY_MB budget
 @st.cache_resource
+def get_registry():
+    registry = ModelRegistry()
+    registry.warm_up(default_warmup())
+    return registry
+
+# Load the pipeline (pipelist.pkl) through the registry
 def load_pipeline():
-    pipeline_path = os.path.join(os.getcwd(), "models", "pipelist.pkl")  # Dynamic path for compatibility
-    
-    # Attempt to load the pipeline
-    if os.path.exists(pipeline_path):
-        try:
-            with open(pipeline_path, "rb") as file:
-                return pickle.load(file)
-        except Exception as e:
-            st.error(f"An error occurred while loading the pipeline: {e}")
-            return None
-    else:
-        st.error(f"pipelist.pkl not found at {pipeline_path}")
+    try:
+        return get_registry().get(PIPELINE_NAME)
+    except FileNotFoundError:
+        st.error(f"pipelist.pkl or the model manifest not found at {PIPELINE_PATH}")
+        return None
+    except Exception as e:
+        st.error(f"An error occurred while loading the pipeline: {e}")
+        return None
+
+# Load individual models by their Predict page name
+def load_model(model_name):
+    try:
+        return get_registry().get(model_name)
+    except FileNotFoundError:
+        st.error(f"{MODELS_PATHS[model_name]} not found.")
+        return None
+    except Exception as e:
+        st.error(f"An error occurred while loading the model: {e}")
         return None
 
-# Load individual model files directly from the Models folder
+
+def show_resident_models():
+    """Sidebar view of the models currently held in memory."""
+    registry = get_registry()
+    with st.sidebar.expander("Resident models"):
+        st.write(f"{registry.resident_bytes() / (1024 * 1024):.2f} MB of "
+                 f"{registry.memory_budget / (1024 * 1024):.0f} MB budget")
+        st.dataframe(pd.DataFrame(registry.resident()), hide_index=True)
+
+
+# Hash of the published pipeline. The resources below are built from it and
+# keyed by it, so a pipeline published by retrain.py replaces them on the
+# next rerun
+def pipeline_version():
+    return get_registry().entry(PIPELINE_NAME)["sha256"]
+
+
+# Low-latency scorer for the single-customer form, built once per pipeline
+@st.cache_resource(max_entries=2)
+def get_single_row_scorer(version):
+    pipeline = load_pipeline()
+    return SingleRowScorer(pipeline) if pipeline is not None else None
+
+
+# Column aliases, dtypes and trained categories that bulk uploads are validated against
+@st.cache_resource(max_entries=2)
+def get_upload_schema(version):
+    pipeline = load_pipeline()
+    return UploadSchema.from_pipeline(pipeline) if pipeline is not None else None
+
+
+def show_quarantine(rows_quarantined, report, quarantine_file):
+    """Reports the rows that failed validation and were left out of scoring."""
+    if rows_quarantined:
+        st.warning(f"{rows_quarantined:,} rows failed validation and were saved to {quarantine_file}")
+        st.dataframe(report)
+
+
+# Per-customer feature contributions for the pipeline, with the training data
+# (a first page of it in out-of-core mode) as the background
+@st.cache_resource(max_entries=2)
+def get_explainer(version):
+    pipeline = load_pipeline()
+    if pipeline is None:
+        return None
+    if outofcore.enabled():
+        background = outofcore.read_page(outofcore.DATASET_DIR, outofcore.dataset_dir_version(),
+                                         list(pipeline.feature_names_in_), 0, EXPLAIN_BACKGROUND_ROWS)
+    else:
+        background = load_dataset()
+    return Explainer(pipeline, background)
+
+
+def show_importance(explanations, units):
+    """Bar chart of the mean absolute contribution of each column over the scored rows."""
+    st.write(f"Feature importance (mean absolute contribution, {units})")
+    st.bar_chart(importance(explanations), horizontal=True)
+
+
+def show_comparison(upload_file, pipeline, version):
+    """Scores an upload with every fitted model, preprocessing it once for all of them."""
+    candidates = {"Pipeline": pipeline.steps[-1][1]}
+    for name in MODELS_PATHS:
+        with span(f"load.model.{name}"):
+            candidates[name] = load_model(name)
+    models, skipped = fitted_models(pipeline, candidates)
+    for name, reason in skipped.items():
+        st.caption(f"{name} skipped: {reason}")
+    if not models:
+        return
+
+    with span("load.upload"):
+        frame = pd.read_csv(upload_file)
+    with span("transform.validate"):
+        frame, quarantined, _ = get_upload_schema(version).validate(frame)
+    if len(quarantined):
+        st.warning(f"{len(quarantined):,} rows failed validation and were left out of the comparison")
+    if not len(frame):
+        return
+    with span("score.compare"):
+        comparison = compare_models(frame, pipeline, models)
+
+    st.dataframe(comparison.summary(), hide_index=True, column_config={
+        "Seconds": st.column_config.NumberColumn(format="%.3f"),
+        "Rows/s": st.column_config.NumberColumn(format="%.0f"),
+        "Churn rate": st.column_config.NumberColumn(format="%.3f"),
+        "Mean agreement": st.column_config.NumberColumn(format="%.3f")})
+    st.caption(f"Preprocessed once in {comparison.timings[TRANSFORM_STEP]:.3f}s for every model; "
+               f"all models agree on {comparison.unanimous():.1%} of customers")
+    st.write("Share of customers on which each pair of models agrees")
+    st.dataframe(comparison.agreement().style.format("{:.3f}"))
+    if comparison.y is not None:
+        col1, col2 = st.columns(2)
+        col1.write("ROC curve")
+        col1.line_chart(comparison.roc_curves(), x_label="False positive rate", y_label="True positive rate")
+        col2.write("Precision-recall curve")
+        col2.line_chart(comparison.pr_curves(), x_label="Recall", y_label="Precision")
+    else:
+        st.caption("Add a Churn column (Yes/No) to the upload for ROC and precision-recall metrics")
+
+    results = pd.concat([frame, comparison.probabilities.add_suffix(" probability")], axis=1)
+    st.dataframe(results.head(100))
+    st.download_button("Download comparison", results.to_csv(index=False), file_name="model_comparison.csv",
+                       mime="text/csv")
+
+
+# Background bulk-scoring jobs, shared by every session of the process
 @st.cache_resource
-def load_model(model_path):
-    if os.path.exists(model_path):
-        try:
-            with open(model_path, "rb") as file:
-                return pickle.load(file)
-        except Exception as e:
-            st.error(f"An error occurred while loading the model: {e}")
-            return None
+def get_job_manager():
+    return JobManager()
+
+
+def _jobs_panel():
+    manager = get_job_manager()
+    jobs = manager.list(owner=st.session_state.get("username"))[:20]
+    if not jobs:
+        st.write("No background jobs yet.")
+        return
+    st.dataframe(pd.DataFrame([{
+        "Job": job["id"], "File": job["name"], "State": job["state"], "Progress": job["progress"],
+        "Rows scored": job["rows_done"], "Rows quarantined": job["rows_quarantined"],
+        "Submitted": pd.Timestamp(job["created"], unit="s").strftime("%Y-%m-%d %H:%M:%S"),
+        "Error": job["error"]} for job in jobs]), hide_index=True,
+        column_config={"Progress": st.column_config.ProgressColumn(min_value=0.0, max_value=1.0)})
+
+    job_id = st.selectbox("Job", [job["id"] for job in jobs], key="bulk_job_selected",
+                          format_func=lambda job_id: f"{job_id} · {manager.status(job_id)['name']}")
+    job, status = manager.get(job_id), manager.status(job_id)
+    if status["state"] in ACTIVE_STATES:
+        st.progress(status["progress"], text=f"{status['state'].capitalize()}: {status['rows_done']:,} rows scored")
+        if st.button("Cancel job", key=f"cancel_{job_id}"):
+            manager.cancel(job_id)
+            st.rerun(scope="fragment")
+        return
+    if status["state"] == DONE:
+        st.dataframe(pd.read_csv(job.path(RESULT_FILE), nrows=100))
+        col1, col2 = st.columns(2)
+        with open(job.path(RESULT_FILE), "rb") as file:
+            col1.download_button("Download predictions", file, file_name=f"predictions_{job_id}.csv",
+                                 mime="text/csv", key=f"download_{job_id}")
+        if status["rows_quarantined"]:
+            with open(job.path(QUARANTINE_FILE), "rb") as file:
+                col2.download_button("Download quarantined rows", file, file_name=f"quarantine_{job_id}.csv",
+                                     mime="text/csv", key=f"download_quarantine_{job_id}")
+    if st.button("Remove job", key=f"remove_{job_id}"):
+        manager.remove(job_id)
+        st.rerun(scope="fragment")
+
+
+def _has_active_jobs():
+    jobs = get_job_manager().list(owner=st.session_state.get("username"))
+    return any(job["state"] in ACTIVE_STATES for job in jobs)
+
+
+# While a job is queued or running the panel polls every two seconds, and
+# hands back to the static panel with a full rerun once all have finished
+@st.fragment(run_every=2)
+def _live_jobs_panel():
+    _jobs_panel()
+    if not _has_active_jobs():
+        st.rerun()
+
+
+@st.fragment
+def _static_jobs_panel():
+    _jobs_panel()
+
+
+def show_jobs():
+    if _has_active_jobs():
+        _live_jobs_panel()
     else:
-        st.error(f"{model_path} not found.")
-        return None
+        _static_jobs_panel()
+
+
+# Churn probabilities of already scored customers, shared by every session
+@st.cache_resource
+def get_prediction_cache():
+    return PredictionCache(db_path=default_db_path())
+
+
+# One scoring pool per process, shared by every session. A new worker count
+# or pipeline replaces it, and the old pool's workers are shut down.
+_engine_lock = threading.Lock()
+_engine = {"key": None, "engine": None}
+
+
+def get_scoring_engine(workers, version):
+    with _engine_lock:
+        if _engine["key"] != (workers, version):
+            if _engine["engine"] is not None:
+                _engine["engine"].shutdown()
+            _engine["engine"] = ScoringEngine(workers=workers)
+            _engine["key"] = (workers, version)
+        return _engine["engine"]
+
+
+@atexit.register
+def shutdown_scoring_engine():
+    with _engine_lock:
+        if _engine["engine"] is not None:
+            _engine["engine"].shutdown()
+        _engine["key"] = _engine["engine"] = None
 
 
 def predict_page():
@@ -43,24 +260,19 @@ def predict_page():
                      ''')
 
     # Load the pipeline
-    pipeline = load_pipeline()
+    with span("load.pipeline"):
+        pipeline = load_pipeline()
     if pipeline is None:
         return  # Stop the function if pipeline loading fails
-
-    # Model paths dictionary
-    models_paths = {
-        'Logistic Regression': os.path.join("models", "LR_model.pkl"),
-        'RF': os.path.join("models", "RF_model.pkl"),
-        'GB': os.path.join("models", "GB_model.pkl"),
-        'KNN': os.path.join("models", "KNN_model.pkl"),
-        'SVC': os.path.join("models", "SVC_model.pkl")
-    }
+    version = pipeline_version()
 
     # Select and load the chosen model
-    model_choice = st.selectbox("Select a model", list(models_paths.keys()))
-    model = load_model(models_paths[model_choice])
+    model_choice = st.selectbox("Select a model", list(MODELS_PATHS.keys()))
+    with span("load.model"):
+        model = load_model(model_choice)
     if model is None:
         return  # Stop the function if model loading fails
+    show_resident_models()
 
     st.write(f"Loaded model type: {type(model)}")
 
@@ -88,36 +300,39 @@ def predict_page():
 
     # Prediction for single customer
     if st.button("Predict Single"):
-        # Create DataFrame for the single customer
-        data = pd.DataFrame({
-            'Gender': [gender],
-            'SeniorCitizen': [senior_citizen],
-            'Partner': [partner],
-            'Dependents': [dependents],
-            'Tenure': [tenure],
-            'PaperlessBilling': [paperless_billing],
-            'PaymentMethod': [payment_method],
-            'MonthlyCharges': [monthly_charges],
-            'TotalCharges': [total_charges],
-            'PhoneService': [phone_service],
-            'MultipleLines': [multiple_lines],
-            'InternetService': [internet_service],
-            'OnlineSecurity': [online_security],
-            'OnlineBackup': [online_backup],
-            'DeviceProtection': [device_protection],
-            'TechSupport': [tech_support],
-            'StreamingTV': [streaming_tv],
-            'StreamingMovies': [streaming_movies],
-            'Contract': [contract]
-        })
-
-        # Use the pipeline to predict
-        prediction = pipeline.predict(data)[0]
-        probability = pipeline.predict_proba(data)[0][1] * 100
+        # Score the customer record in a single pass, without a per-click DataFrame
+        with span("score.single"):
+            customer = {
+                'Gender': gender,
+                'SeniorCitizen': senior_citizen,
+                'Partner': partner,
+                'Dependents': dependents,
+                'Tenure': tenure,
+                'PaperlessBilling': paperless_billing,
+                'PaymentMethod': payment_method,
+                'MonthlyCharges': monthly_charges,
+                'TotalCharges': total_charges,
+                'PhoneService': phone_service,
+                'MultipleLines': multiple_lines,
+                'InternetService': internet_service,
+                'OnlineSecurity': online_security,
+                'OnlineBackup': online_backup,
+                'DeviceProtection': device_protection,
+                'TechSupport': tech_support,
+                'StreamingTV': streaming_tv,
+                'StreamingMovies': streaming_movies,
+                'Contract': contract
+            }
+            prediction, probability = get_single_row_scorer(version).score(customer)
 
         # Display results
-        st.write(f"Prediction: {'Churn' if prediction == 1 else 'Not Churn'}")
+        st.write(f"Prediction: {prediction}")
         st.write(f"Churn Probability: {probability:.2f}%")
+        explainer = get_explainer(version)
+        if explainer is not None:
+            with span("explain.single"):
+                factors = top_factors(explainer.explain(pd.DataFrame([customer])))[0]
+            st.write(f"Top risk factors: {factors or 'none'}")
 
 
     #Bulk Predicition
@@ -125,43 +340,120 @@ def predict_page():
     st.write("Upload a CSV file with customer data")
 
     upload_file =st.file_uploader("Choose the file to upload", type ='csv')
-    if upload_file is not None:
+    background = st.toggle("Run as background job", value=True,
+                           help="Score the upload off this page and keep its results under a job id")
+    streaming = background or st.toggle("Streaming mode (large files)",
+                                        help="Score the upload in fixed-size chunks so memory stays bounded")
+    if streaming:
+        chunk_size = st.number_input("Rows per chunk", min_value=1_000,
+                                     value=DEFAULT_CHUNK_SIZE, step=10_000)
+    parallel = st.toggle("Parallel scoring",
+                         help="Shard the upload across a pool of worker processes")
+    if parallel:
+        workers = st.number_input("Worker processes", min_value=1, value=default_workers())
+        scorer = get_scoring_engine(int(workers), version)
+    else:
+        scorer = pipeline
+    if st.toggle("Reuse cached predictions", value=True,
+                 help="Score only customers whose features this pipeline has not scored before"):
+        cache = get_prediction_cache()
+        scorer = CachedScorer(scorer, cache, version,
+                              pipeline.feature_names_in_)
+        if cache.hits + cache.misses:
+            st.caption(f"Prediction cache: {cache.rows():,} customers, "
+                       f"{cache.hits / (cache.hits + cache.misses):.0%} of scored rows served from cache")
+
+    explain = st.toggle("Explain predictions", value=True,
+                        help="Add each customer's top risk factors to the results (in-memory scoring only)")
+
+    if upload_file is not None and background:
+        # A button rather than the upload itself, so reruns never submit it twice
+        if st.button("Submit job"):
+            job_id = get_job_manager().submit(upload_file, upload_file.name, st.session_state.get("username"),
+                                              scorer, get_upload_schema(version), chunksize=int(chunk_size))
+            st.success(f"Job {job_id} submitted")
+    elif upload_file is not None:
+        result_file ="data/bulk_predictions.csv"
+        quarantine_file = "data/bulk_quarantine.csv"
+        schema = get_upload_schema(version)
         try:
-            bulk_data =pd.read_csv(upload_file)
-            st.write("Data Preview", bulk_data.head())
+            if streaming:
+                st.write("Data Preview", pd.read_csv(upload_file, nrows=5))
+                upload_file.seek(0)
+
+                progress = st.progress(0.0, text="Scoring...")
 
-            #required columns
-            required_columns =[
-                'gender', 'SeniorCitizen', 'Partner', 'Dependents', 'tenure',
-                'PhoneService', 'MultipleLines', 'InternetService', 'OnlineSecurity',
-                'OnlineBackup', 'DeviceProtection', 'TechSupport', 'StreamingTV',
-                'StreamingMovies', 'Contract', 'PaperlessBilling', 'PaymentMethod',
-                'MonthlyCharges', 'TotalCharges'
-            ]
-            
+                def report_progress(chunk, rows_done):
+                    fraction = min(upload_file.tell() / max(upload_file.size, 1), 1.0)
+                    progress.progress(fraction, text=f"Scored {rows_done:,} rows")
 
-            if all(col in bulk_data.columns for col in required_columns):
+                # Each chunk is validated on its own; bad rows go to the quarantine file
+                with span("score.bulk_streaming"):
+                    rows_done, rows_quarantined = stream_bulk_predictions(
+                        upload_file, scorer, result_file, quarantine_file, schema,
+                        chunksize=int(chunk_size), on_chunk=report_progress)
+                progress.progress(1.0, text=f"Scored {rows_done:,} rows")
+                show_quarantine(rows_quarantined, pd.read_csv(quarantine_file, nrows=100)
+                                if rows_quarantined else None, quarantine_file)
 
-                bulk_predictions =pipeline.predict(bulk_data)
-                bulk_probability =pipeline.predict_proba(bulk_data)[:,1]*100
+                # Nothing was written to the results file when every row failed validation
+                if rows_done:
+                    st.write("Bulk Prediction Results (first rows):")
+                    st.dataframe(pd.read_csv(result_file, nrows=100))
+                    st.success(f"Results saved successfully to{result_file}")
+                else:
+                    st.warning("No rows passed validation, so nothing was scored.")
+            else:
+                with span("load.upload"):
+                    bulk_data =pd.read_csv(upload_file)
+                st.write("Data Preview", bulk_data.head())
 
-                #display results
-                bulk_results =bulk_data.copy()
-                bulk_results["Predictions"] =['Churn' if pred ==1 else 'Not Churn' for pred in bulk_predictions]
-                bulk_results['Churned Probability'] = bulk_probability
+                # Normalize the upload to the training schema and set aside invalid rows
+                with span("transform.validate"):
+                    bulk_data, quarantined, errors = schema.validate(bulk_data)
+                if len(quarantined):
+                    quarantined.to_csv(quarantine_file, index=False)
+                show_quarantine(len(quarantined), errors, quarantine_file)
+
+                #score once and attach the results to the uploaded frame
+                with span("score.bulk"):
+                    if len(bulk_data):
+                        add_predictions(bulk_data, *score_frame(scorer, bulk_data))
+                explanations = None
+                explainer = get_explainer(version) if explain and len(bulk_data) else None
+                if explainer is not None:
+                    with span("explain.bulk"):
+                        explanations = explainer.explain(bulk_data)
+                        bulk_data["Top risk factors"] = top_factors(explanations)
 
                 st.write("Bulk Prediction Results:")
-                st.dataframe(bulk_results)
+                st.dataframe(bulk_data)
+                if explanations is not None:
+                    show_importance(explanations, explainer.units)
 
 
                 # save the results
-                result_file ="data/bulk_predictions.csv"
-                bulk_results.to_csv(result_file, index =False)
+                with span("save.results"):
+                    bulk_data.to_csv(result_file, index =False)
                 st.success(f"Results saved successfully to{result_file}")
-            else:
-                st.error("Upload csv not the same columns")
+        except ValueError as e:
+            st.error(str(e))
         except Exception as e:
-            st.error(f"Error during bulk prediction")
+            st.error(f"Error during bulk prediction: {e}")
+
+    st.header("Model Comparison")
+    st.write("Score one CSV file with every fitted model side by side")
+    compare_file = st.file_uploader("Choose the file to compare models on", type="csv", key="compare_upload")
+    if compare_file is not None:
+        try:
+            show_comparison(compare_file, pipeline, version)
+        except ValueError as e:
+            st.error(str(e))
+        except Exception as e:
+            st.error(f"Error during model comparison: {e}")
+
+    st.subheader("Background Jobs")
+    show_jobs()
 
     if __name__ =="__main__":
          predict_page()
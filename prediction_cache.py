@@ -0,0 +1,231 @@
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+# Cache of churn probabilities keyed by (model artifact sha256, row feature
+# hash). Rows are hashed in one vectorized pass with
+# pd.util.hash_pandas_object, so a batch costs one hash per row plus an
+# index lookup; only the misses go to the model. The memory tier holds up
+# to CHURN_PREDICTION_CACHE_ROWS probabilities and evicts the least
+# recently used rows, in batch granularity. Setting
+# CHURN_PREDICTION_CACHE_DB adds a persistent SQLite tier that memory
+# misses fall back to and every new score is written through to. It runs in
+# WAL mode with one connection per thread, and is trimmed to
+# CHURN_PREDICTION_CACHE_DB_ROWS, least recently read or written rows first.
+#
+# Row hashes are 64-bit: at ten million distinct rows the chance of any
+# collision is about 3 in a million.
+
+DEFAULT_MAX_ROWS = 1_000_000
+DEFAULT_MAX_DB_ROWS = 10_000_000
+LOOKUP_BATCH = 500  # SQLite's default limit is 999 bound parameters
+TRIM_EVERY = 32  # stores between size checks
+TRIM_TO = 0.9  # fraction of the row cap left after a trim
+TOUCH_SECONDS = 60  # resolution of the on-disk access times
+
+
+def default_max_rows():
+    return int(os.environ.get("CHURN_PREDICTION_CACHE_ROWS", 0)) or DEFAULT_MAX_ROWS
+
+
+def default_max_db_rows():
+    return int(os.environ.get("CHURN_PREDICTION_CACHE_DB_ROWS", 0)) or DEFAULT_MAX_DB_ROWS
+
+
+def default_db_path():
+    return os.environ.get("CHURN_PREDICTION_CACHE_DB") or None
+
+
+def row_hashes(frame, columns):
+    """One uint64 hash per row of frame[columns], independent of the index."""
+    return pd.util.hash_pandas_object(frame[list(columns)], index=False).to_numpy()
+
+
+class _Segment:
+    """Cached probabilities of one model: hashes, values and last-use ticks."""
+
+    def __init__(self):
+        self.index = pd.Index(np.empty(0, dtype=np.uint64))
+        self.values = np.empty(0)
+        self.ticks = np.empty(0, dtype=np.int64)
+
+
+class PredictionCache:
+    """Bounded in-memory LRU of churn probabilities with an optional SQLite tier."""
+
+    def __init__(self, max_rows=None, db_path=None, max_db_rows=None):
+        self.max_rows = max_rows or default_max_rows()
+        self.db_path = db_path
+        self.max_db_rows = max_db_rows or default_max_db_rows()
+        self.hits = self.misses = 0
+        self._segments = {}  # model hash -> _Segment
+        self._tick = 0
+        self._stores = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        if db_path:
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+            db = self._connection()
+            db.execute("PRAGMA journal_mode=WAL")
+            with db:
+                db.execute("CREATE TABLE IF NOT EXISTS predictions (model TEXT, key INTEGER, probability REAL, "
+                           "accessed REAL, PRIMARY KEY (model, key)) WITHOUT ROWID")
+                # Databases written before access times were recorded
+                if "accessed" not in [row[1] for row in db.execute("PRAGMA table_info(predictions)")]:
+                    db.execute("ALTER TABLE predictions ADD COLUMN accessed REAL DEFAULT 0")
+                db.execute("CREATE INDEX IF NOT EXISTS predictions_accessed ON predictions (accessed)")
+
+    def _connection(self):
+        # sqlite3 connections belong to the thread that opened them
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.db_path, timeout=30)
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def rows(self):
+        return sum(len(segment.values) for segment in self._segments.values())
+
+    def lookup(self, model, keys):
+        """Returns (probabilities, found mask) for an array of row hashes."""
+        keys = np.asarray(keys, dtype=np.uint64)
+        values = np.full(len(keys), np.nan)
+        with self._lock:
+            self._tick += 1
+            segment = self._segments.get(model)
+            if segment is not None and len(segment.values):
+                positions = segment.index.get_indexer(keys)
+                found = positions >= 0
+                values[found] = segment.values[positions[found]]
+                segment.ticks[positions[found]] = self._tick
+        found = ~np.isnan(values)
+        if self.db_path and not found.all():
+            missing = np.flatnonzero(~found)
+            stored_keys, stored_values = self._read_db(model, np.unique(keys[missing]))
+            if len(stored_keys):
+                self._remember(model, stored_keys, stored_values)
+                positions = pd.Index(stored_keys).get_indexer(keys[missing])
+                hit = positions >= 0
+                values[missing[hit]] = stored_values[positions[hit]]
+                found = ~np.isnan(values)
+        with self._lock:
+            self.hits += int(found.sum())
+            self.misses += int(len(keys) - found.sum())
+        return values, found
+
+    def store(self, model, keys, probabilities):
+        """Adds freshly scored rows; keys must be distinct and not yet cached."""
+        keys = np.asarray(keys, dtype=np.uint64)
+        probabilities = np.asarray(probabilities, dtype=float)
+        self._remember(model, keys, probabilities)
+        if self.db_path:
+            db = self._connection()
+            now = time.time()
+            with db:
+                db.executemany("INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?)",
+                               zip([model] * len(keys), keys.view(np.int64).tolist(), probabilities.tolist(),
+                                   [now] * len(keys)))
+            with self._lock:
+                self._stores += 1
+                trim = self._stores % TRIM_EVERY == 0
+            if trim:
+                self.trim_db()
+
+    def trim_db(self):
+        """Deletes the least recently used rows on disk until TRIM_TO of max_db_rows are left."""
+        db = self._connection()
+        with db:
+            total = db.execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+            if total <= self.max_db_rows:
+                return
+            db.execute("DELETE FROM predictions WHERE (model, key) IN "
+                       "(SELECT model, key FROM predictions ORDER BY accessed LIMIT ?)",
+                       (total - int(self.max_db_rows * TRIM_TO),))
+
+    def _remember(self, model, keys, probabilities):
+        if not len(keys):
+            return
+        with self._lock:
+            segment = self._segments.setdefault(model, _Segment())
+            fresh = segment.index.get_indexer(keys) < 0
+            keys, probabilities = keys[fresh], probabilities[fresh]
+            segment.index = segment.index.append(pd.Index(keys))
+            segment.values = np.concatenate([segment.values, probabilities])
+            segment.ticks = np.concatenate([segment.ticks, np.full(len(keys), self._tick, dtype=np.int64)])
+            self._evict()
+
+    def _evict(self):
+        """Drops the least recently used rows across all models down to max_rows."""
+        excess = self.rows() - self.max_rows
+        if excess <= 0:
+            return
+        segments = list(self._segments.items())
+        # Exactly the excess oldest rows go, even when many share a tick
+        drop = np.zeros(self.rows(), dtype=bool)
+        drop[np.argpartition(np.concatenate([segment.ticks for _, segment in segments]), excess - 1)[:excess]] = True
+        offset = 0
+        for model, segment in segments:
+            keep = ~drop[offset:offset + len(segment.values)]
+            offset += len(segment.values)
+            segment.index, segment.values, segment.ticks = segment.index[keep], segment.values[keep], segment.ticks[keep]
+            if not len(segment.values):
+                del self._segments[model]
+
+    def _read_db(self, model, keys):
+        """Returns (keys, probabilities) of the given distinct keys found on disk."""
+        rows, stale = [], []
+        signed = keys.view(np.int64).tolist()
+        now = time.time()
+        db = self._connection()
+        with db:
+            for start in range(0, len(signed), LOOKUP_BATCH):
+                batch = signed[start:start + LOOKUP_BATCH]
+                for key, probability, accessed in db.execute(
+                        f"SELECT key, probability, accessed FROM predictions WHERE model = ? AND key IN "
+                        f"({','.join('?' * len(batch))})", [model, *batch]):
+                    rows.append((key, probability))
+                    if now - (accessed or 0) > TOUCH_SECONDS:
+                        stale.append(key)
+            # A hit refreshes its access time at most once per TOUCH_SECONDS
+            for start in range(0, len(stale), LOOKUP_BATCH):
+                batch = stale[start:start + LOOKUP_BATCH]
+                db.execute(f"UPDATE predictions SET accessed = ? WHERE model = ? AND key IN "
+                           f"({','.join('?' * len(batch))})", [now, model, *batch])
+        stored = np.array(rows, dtype=[("key", np.int64), ("probability", float)])
+        return stored["key"].view(np.uint64), stored["probability"]
+
+    def clear(self):
+        with self._lock:
+            self._segments.clear()
+            self.hits = self.misses = 0
+
+
+class CachedScorer:
+    """Scores frames through a PredictionCache, sending only misses to the model.
+
+    Exposes predict_proba() like the pipeline and ScoringEngine, so it can
+    stand in for either in score_frame() and stream_bulk_predictions().
+    Duplicate rows within a batch are scored once.
+    """
+
+    def __init__(self, scorer, cache, model_hash, columns):
+        self.scorer = scorer
+        self.cache = cache
+        self.model_hash = model_hash
+        self.columns = list(columns)
+
+    def predict_proba(self, frame):
+        keys = row_hashes(frame, self.columns)
+        probability, found = self.cache.lookup(self.model_hash, keys)
+        if not found.all():
+            missing = np.flatnonzero(~found)
+            unique_keys, first, inverse = np.unique(keys[missing], return_index=True, return_inverse=True)
+            scored = self.scorer.predict_proba(frame.iloc[missing[first]])[:, 1]
+            self.cache.store(self.model_hash, unique_keys, scored)
+            probability[missing] = scored[inverse]
+        return np.column_stack([1 - probability, probability])
@@ -0,0 +1,87 @@
+import numpy as np
+
+# Data reduction in front of the dashboard plots: histograms and KDEs are
+# pre-binned with NumPy, and scatter-style charts get a bounded, stratified
+# sample or a 2D binning, so chart cost no longer grows with the row count.
+MAX_POINTS = 5_000
+POINT_BUDGETS = [1_000, 2_000, 5_000, 10_000, 20_000]
+KDE_GRID_SIZE = 512
+SCATTER_MODES = ["Sample", "Hexbin", "2D histogram"]
+
+
+def _finite(values):
+    values = np.asarray(values, dtype=float)
+    return values[np.isfinite(values)]
+
+
+def binned_counts(values, bins=10):
+    """Returns (counts, edges) of a histogram over the finite values."""
+    return np.histogram(_finite(values), bins=bins)
+
+
+def binned_kde(values, grid_size=KDE_GRID_SIZE, bw_method="scott"):
+    """Returns (grid, density) of a Gaussian KDE computed on a binned grid.
+
+    The values are counted into grid_size bins and the counts convolved with
+    the kernel, which costs O(n + grid_size**2) rather than O(n * grid_size).
+    """
+    values = _finite(values)
+    n = len(values)
+    std = values.std(ddof=1) if n > 1 else 0.0
+    support = kde_support(n, std, values.min() if n else 0.0, values.max() if n else 0.0, bw_method)
+    if support is None:
+        return np.array([]), np.array([])
+    bandwidth, low, high = support
+    counts, edges = np.histogram(values, bins=grid_size, range=(low, high))
+    return kde_from_counts(counts, edges, n, bandwidth)
+
+
+def kde_support(n, std, minimum, maximum, bw_method="scott"):
+    """Returns (bandwidth, low, high) of the KDE grid, or None if there is no spread."""
+    if n < 2 or std == 0:
+        return None
+    # Scott's rule, the seaborn/scipy default
+    factor = n ** (-1 / 5) if bw_method == "scott" else float(bw_method)
+    bandwidth = factor * std
+    # seaborn extends the support by 3 bandwidths on each side
+    return bandwidth, minimum - 3 * bandwidth, maximum + 3 * bandwidth
+
+
+def kde_from_counts(counts, edges, n, bandwidth):
+    """Returns (grid, density) from histogram counts over an evenly spaced grid.
+
+    Counts can be accumulated batch by batch, so the KDE of data that is
+    never held in memory at once needs only its moments and this histogram.
+    """
+    grid_size = len(counts)
+    grid = (edges[:-1] + edges[1:]) / 2
+    step = edges[1] - edges[0]
+    offsets = np.arange(-(grid_size - 1), grid_size) * step
+    kernel = np.exp(-0.5 * (offsets / bandwidth) ** 2)
+    density = np.convolve(counts, kernel)[grid_size - 1:2 * grid_size - 1]
+    density /= n * bandwidth * np.sqrt(2 * np.pi)
+    return grid, density
+
+
+def binned_2d(x, y, bins=50):
+    """Returns (counts, x_edges, y_edges) of a 2D histogram over finite pairs."""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    finite = np.isfinite(x) & np.isfinite(y)
+    return np.histogram2d(x[finite], y[finite], bins=bins)
+
+
+def stratified_sample(data, by, max_points=MAX_POINTS, seed=0):
+    """Returns at most ~max_points rows, sampled proportionally within each `by` group."""
+    if len(data) <= max_points:
+        return data
+    fraction = max_points / len(data)
+    return data.groupby(by, observed=True, group_keys=False).sample(frac=fraction, random_state=seed)
+
+
+def annotate_sampling(fig, shown, total):
+    """Notes on the figure how many of the rows a chart is drawn from."""
+    if shown >= total:
+        return
+    fig.text(0.99, 0.005, f"Showing {shown:,} of {total:,} rows ({shown / total:.1%} sample)",
+             ha="right", va="bottom", fontsize=8, color="gray")
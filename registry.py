@@ -0,0 +1,261 @@
+import argparse
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import joblib
+
+from scoring import PIPELINE_PATH, converted_path, file_sha256, read_artifact, resolve_artifact
+
+# Model artifact registry. models/manifest.json records each registered
+# artifact's path, hash, size and feature schema; artifacts are loaded lazily
+# on first use, verified against the manifest, and evicted least recently used
+# first once the resident set exceeds the memory budget.
+MODELS_DIR = "models"
+MANIFEST_PATH = os.path.join(MODELS_DIR, "manifest.json")
+PIPELINE_NAME = "pipeline"
+
+# Models offered on the Predict page
+MODELS_PATHS = {
+    'Logistic Regression': os.path.join("models", "LR_model.pkl"),
+    'RF': os.path.join("models", "RF_model.pkl"),
+    'GB': os.path.join("models", "GB_model.pkl"),
+    'KNN': os.path.join("models", "KNN_model.pkl"),
+    'SVC': os.path.join("models", "SVC_model.pkl")
+}
+REGISTERED_PATHS = {PIPELINE_NAME: PIPELINE_PATH, **MODELS_PATHS}
+
+DEFAULT_MEMORY_BUDGET_MB = 512
+PUBLISH_GRACE_SECONDS = 0.2
+
+
+def feature_schema(artifact):
+    """Returns the input columns an artifact was fitted on, if it records them."""
+    names = getattr(artifact, "feature_names_in_", None)
+    if names is not None:
+        return [str(name) for name in names]
+    return None
+
+
+def describe_artifact(path, manifest_path=MANIFEST_PATH):
+    """Builds the manifest entry for an artifact, or for its registered converted copy.
+
+    Entries of converted copies also record the sha256 of their .pkl source.
+    """
+    resolved = resolve_artifact(path, manifest_path)
+    artifact = read_artifact(resolved)
+    entry = {
+        "path": resolved,
+        "sha256": file_sha256(resolved),
+        "size": os.path.getsize(resolved),
+        "class": f"{type(artifact).__module__}.{type(artifact).__name__}",
+        "features": feature_schema(artifact),
+    }
+    if resolved != path:
+        entry["source_sha256"] = file_sha256(path)
+    return entry
+
+
+def write_manifest(manifest, manifest_path=MANIFEST_PATH):
+    """Replaces the manifest atomically, so readers never see a partial file."""
+    tmp_path = f"{manifest_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as file:
+        json.dump(manifest, file, indent=2)
+        file.write("\n")
+    os.replace(tmp_path, manifest_path)
+
+
+def build_manifest(paths=REGISTERED_PATHS, manifest_path=MANIFEST_PATH):
+    """Writes a manifest for the given {name: path} artifacts and returns it."""
+    manifest = {"artifacts": {name: describe_artifact(path, manifest_path) for name, path in paths.items()}}
+    write_manifest(manifest, manifest_path)
+    return manifest
+
+
+def convert_artifacts(paths=REGISTERED_PATHS, manifest_path=MANIFEST_PATH, force=False):
+    """Writes a memory-mappable .joblib copy of each artifact and re-registers them.
+
+    The original .pkl files are left in place. A registered copy that differs
+    from a fresh conversion of an unchanged .pkl was published by retrain.py;
+    unless force is set, nothing is converted and a ValueError names them.
+    """
+    manifest = read_manifest(manifest_path) if os.path.exists(manifest_path) else {"artifacts": {}}
+    staged, retrained = [], []
+    for name, path in paths.items():
+        # The source itself, never a possibly stale converted copy
+        artifact = joblib.load(path)
+        target = converted_path(path)
+        tmp_path = f"{target}.{os.getpid()}.tmp"
+        # Uncompressed, so joblib stores the arrays aligned for memory-mapping
+        joblib.dump(artifact, tmp_path, compress=0)
+        entry = {**describe_artifact(tmp_path, manifest_path), "path": target, "source_sha256": file_sha256(path)}
+        registered = manifest["artifacts"].get(name)
+        if (registered is not None and os.path.normpath(registered["path"]) == os.path.normpath(target)
+                and registered["sha256"] != entry["sha256"]
+                and registered.get("source_sha256", entry["source_sha256"]) == entry["source_sha256"]):
+            retrained.append(name)
+        staged.append((name, tmp_path, target, entry))
+    if retrained and not force:
+        for _, tmp_path, _, _ in staged:
+            os.remove(tmp_path)
+        raise ValueError(f"{', '.join(retrained)} changed since conversion (retrained?); converting would "
+                         f"replace them with their .pkl sources. Pass --force to do it anyway")
+    for name, tmp_path, target, entry in staged:
+        os.replace(tmp_path, target)
+        manifest["artifacts"][name] = entry
+    write_manifest(manifest, manifest_path)
+    return manifest
+
+
+def read_manifest(manifest_path=MANIFEST_PATH):
+    with open(manifest_path) as file:
+        return json.load(file)
+
+
+def unregistered_artifacts(manifest, models_dir=MODELS_DIR):
+    """Lists files in the models directory that the manifest does not cover."""
+    registered = {os.path.normpath(entry["path"]) for entry in manifest["artifacts"].values()}
+    registered.add(os.path.normpath(MANIFEST_PATH))
+    # The .pkl sources of converted artifacts are covered by their .joblib entries
+    return sorted(path for path in (os.path.join(models_dir, name) for name in os.listdir(models_dir))
+                  if os.path.isfile(path) and os.path.normpath(path) not in registered
+                  and os.path.normpath(converted_path(path)) not in registered)
+
+
+def default_memory_budget():
+    """Memory budget in bytes, from CHURN_MODEL_MEMORY_MB or the default."""
+    return int(os.environ.get("CHURN_MODEL_MEMORY_MB", DEFAULT_MEMORY_BUDGET_MB)) * 1024 * 1024
+
+
+def default_warmup():
+    """Artifacts to load at startup, from the comma-separated CHURN_MODEL_WARMUP."""
+    names = os.environ.get("CHURN_MODEL_WARMUP", PIPELINE_NAME)
+    return [name.strip() for name in names.split(",") if name.strip()]
+
+
+class ModelRegistry:
+    """Lazily loads manifest artifacts and keeps them within a memory budget.
+
+    Footprints are estimated from each artifact's size on disk; memory-mapped
+    arrays are shared with other processes, so this is an upper bound.
+    Pinned artifacts are never evicted; the most recently used artifact is
+    kept even if it alone exceeds the budget. A manifest rewritten on disk,
+    e.g. by retrain.py, is picked up on the next get().
+    """
+
+    def __init__(self, manifest_path=MANIFEST_PATH, memory_budget=None, pinned=(PIPELINE_NAME,)):
+        self.manifest_path = manifest_path
+        self._manifest_mtime = os.stat(manifest_path).st_mtime_ns
+        self.manifest = read_manifest(manifest_path)
+        self.memory_budget = memory_budget or default_memory_budget()
+        self.pinned = set(pinned)
+        self._resident = OrderedDict()  # name -> (artifact, nbytes, loaded_at)
+        self._lock = threading.RLock()
+
+    def names(self):
+        return list(self.manifest["artifacts"])
+
+    def entry(self, name):
+        try:
+            return self.manifest["artifacts"][name]
+        except KeyError:
+            raise KeyError(f"{name!r} is not registered in {self.manifest_path}") from None
+
+    def refresh(self):
+        """Re-reads the manifest if it changed on disk and drops artifacts whose hash changed."""
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime_ns
+        except OSError:
+            return False
+        with self._lock:
+            if mtime == self._manifest_mtime:
+                return False
+            manifest = read_manifest(self.manifest_path)
+            for name in list(self._resident):
+                entry = manifest["artifacts"].get(name)
+                if entry is None or entry["sha256"] != self.manifest["artifacts"][name]["sha256"]:
+                    del self._resident[name]
+            self.manifest, self._manifest_mtime = manifest, mtime
+            return True
+
+    def get(self, name):
+        """Returns the artifact, loading and verifying it on first use."""
+        self.refresh()
+        with self._lock:
+            if name in self._resident:
+                self._resident.move_to_end(name)
+                return self._resident[name][0]
+
+            entry = self.entry(name)
+            if file_sha256(entry["path"]) != entry["sha256"]:
+                # A newly published artifact lands just before its manifest
+                time.sleep(PUBLISH_GRACE_SECONDS)
+                self.refresh()
+                entry = self.entry(name)
+                if file_sha256(entry["path"]) != entry["sha256"]:
+                    raise ValueError(f"{entry['path']} does not match its manifest hash; "
+                                     f"rebuild the manifest with `python registry.py build`")
+            artifact = read_artifact(entry["path"])
+            self._resident[name] = (artifact, entry["size"], time.time())
+            self._evict_over_budget()
+            return artifact
+
+    def warm_up(self, names):
+        """Loads the given artifacts ahead of first use, skipping unknown names."""
+        for name in names:
+            if name in self.manifest["artifacts"]:
+                self.get(name)
+
+    def evict(self, name):
+        with self._lock:
+            self._resident.pop(name, None)
+
+    def resident_bytes(self):
+        with self._lock:
+            return sum(nbytes for _, nbytes, _ in self._resident.values())
+
+    def resident(self):
+        """Describes resident artifacts, least recently used first."""
+        with self._lock:
+            return [{"name": name, "class": self.manifest["artifacts"][name]["class"],
+                     "memory_mb": nbytes / (1024 * 1024), "pinned": name in self.pinned,
+                     "loaded_at": time.strftime("%H:%M:%S", time.localtime(loaded_at))}
+                    for name, (_, nbytes, loaded_at) in self._resident.items()]
+
+    def _evict_over_budget(self):
+        newest = next(reversed(self._resident))
+        for name in list(self._resident):
+            if self.resident_bytes() <= self.memory_budget:
+                break
+            if name != newest and name not in self.pinned:
+                del self._resident[name]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Model artifact registry")
+    parser.add_argument("command", choices=["build", "convert", "list"],
+                        help="build: rewrite models/manifest.json; convert: write memory-mappable "
+                             ".joblib copies and register them; list: show registered and stray artifacts")
+    parser.add_argument("--force", action="store_true",
+                        help="convert: also replace artifacts that changed since conversion, e.g. retrained ones")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        manifest = build_manifest()
+    elif args.command == "convert":
+        try:
+            manifest = convert_artifacts(force=args.force)
+        except ValueError as e:
+            parser.error(str(e))
+    else:
+        manifest = read_manifest()
+    for name, entry in manifest["artifacts"].items():
+        print(f"{name:<20} {entry['path']:<28} {entry['size']:>9,} B  {entry['class']}")
+    for path in unregistered_artifacts(manifest):
+        print(f"{'(unregistered)':<20} {path}")
+
+
+if __name__ == "__main__":
+    main()
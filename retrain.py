@@ -0,0 +1,240 @@
+import argparse
+import hashlib
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import BaseEstimator, clone
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+
+from dataset import CACHE_DIR, DATASET_PATH, read_csv_typed
+from registry import (MANIFEST_PATH, PIPELINE_NAME, REGISTERED_PATHS, describe_artifact, file_sha256,
+                      read_manifest, write_manifest)
+from scoring import converted_path, read_artifact
+
+# Retraining for the registered models. The pipeline and the Predict page
+# candidates are refitted on labelled data (data/train_set.csv plus any
+# extra CSVs with a Churn column) and published in place of their .joblib
+# artifacts, so running apps pick them up from the manifest on their next
+# request without a restart.
+#
+#   python retrain.py                       # warm start where possible
+#   python retrain.py --full --data new.csv # refit everything from scratch
+#
+# The preprocessor output for a data version is cached under
+# data/.cache/retrain, and every candidate is fitted on that one matrix, in
+# parallel. An incremental run keeps the published preprocessor, so the
+# feature space stays the one the fitted models expect, and grows or
+# continues the models that support it: random forests and gradient
+# boosting get more trees/stages, linear models start from their current
+# coefficients, and estimators with partial_fit are updated in place. The
+# rest are refitted.
+
+RETRAIN_CACHE_DIR = os.path.join(CACHE_DIR, "retrain")
+LABEL_COLUMN = "Churn"
+GROW_FRACTION = 0.1  # share of extra trees/stages per incremental run
+
+# Used where a registered artifact is not an estimator to clone
+DEFAULT_ESTIMATORS = {
+    'Logistic Regression': LogisticRegression(max_iter=1000),
+}
+
+
+def default_jobs():
+    """Candidates fitted at once, from CHURN_RETRAIN_JOBS (default: all cores)."""
+    return int(os.environ.get("CHURN_RETRAIN_JOBS", 0)) or os.cpu_count() or 1
+
+
+def labels(values):
+    """Churn labels (Yes/No, 1/0, True/False) as 0/1, NaN where unrecognized."""
+    mapping = {"yes": 1, "no": 0, "1": 1, "0": 0, "true": 1, "false": 0, "1.0": 1, "0.0": 0}
+    return pd.Series(values).astype(str).str.strip().str.lower().map(mapping)
+
+
+def load_training_data(paths, columns):
+    """Reads the labelled CSVs and returns (features, labels, data version)."""
+    frames, digest = [], hashlib.sha256()
+    for path in paths:
+        digest.update(file_sha256(path).encode())
+        frame = read_csv_typed(path)
+        missing = [col for col in [*columns, LABEL_COLUMN] if col not in frame.columns]
+        if missing:
+            raise ValueError(f"{path} is missing columns: {', '.join(missing)}")
+        frames.append(frame)
+    data = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+    y = labels(data[LABEL_COLUMN])
+    keep = y.notna().to_numpy()
+    # Align categories across files so the preprocessor sees one dtype per column
+    features = data.loc[keep, columns].astype({col: object for col in columns
+                                               if isinstance(data[col].dtype, pd.CategoricalDtype)})
+    return features.reset_index(drop=True), y[keep].astype(int).to_numpy(), digest.hexdigest()[:16]
+
+
+def preprocess(preprocessor, features, y, data_version, fit):
+    """Returns (fitted preprocessor, transformed matrix, labels), cached per data version.
+
+    The cache key covers the data, the preprocessor's parameters and, when the
+    preprocessor is reused rather than refitted, its fitted state.
+    """
+    key = joblib.hash((data_version, fit, preprocessor if not fit else clone(preprocessor)))
+    path = os.path.join(RETRAIN_CACHE_DIR, f"{key}.joblib")
+    if os.path.exists(path):
+        return joblib.load(path, mmap_mode="r")
+    if fit:
+        preprocessor = clone(preprocessor).fit(features, y)
+    transformed = preprocessor.transform(features)
+    transformed = transformed.toarray() if hasattr(transformed, "toarray") else np.asarray(transformed)
+    os.makedirs(RETRAIN_CACHE_DIR, exist_ok=True)
+    # Uncompressed, so later runs memory-map the matrix instead of reading it
+    joblib.dump((preprocessor, transformed, y), f"{path}.{os.getpid()}.tmp", compress=0)
+    os.replace(f"{path}.{os.getpid()}.tmp", path)
+    return preprocessor, transformed, y
+
+
+def is_fitted(estimator):
+    return any(name.endswith("_") and not name.startswith("_") for name in vars(estimator))
+
+
+def template_for(name, artifact):
+    """Unfitted estimator with the artifact's hyperparameters."""
+    if isinstance(artifact, BaseEstimator):
+        template = clone(artifact)
+    elif name in DEFAULT_ESTIMATORS:
+        template = clone(DEFAULT_ESTIMATORS[name])
+    else:
+        raise TypeError(f"{name} is a {type(artifact).__name__}, not an estimator")
+    if "probability" in template.get_params():
+        template.set_params(probability=True)  # SVC scores through predict_proba
+    return template
+
+
+def supports_warm_start(estimator):
+    """Whether refitting with warm_start=True continues from the fitted state."""
+    params = estimator.get_params()
+    # liblinear accepts warm_start but always fits from scratch
+    return params.get("warm_start") is not None and params.get("solver") != "liblinear"
+
+
+def fit_candidate(name, template, previous, X, y, warm):
+    """Fits one candidate, warm-starting from previous where the estimator allows it.
+
+    Returns (name, fitted estimator, how it was fitted, seconds).
+    """
+    start = time.perf_counter()
+    usable = (warm and previous is not None and type(previous) is type(template) and is_fitted(previous)
+              and getattr(previous, "n_features_in_", X.shape[1]) == X.shape[1])
+    params = template.get_params()
+    if usable and hasattr(previous, "partial_fit"):
+        estimator, how = previous, "partial_fit"
+        estimator.partial_fit(X, y)
+    elif usable and supports_warm_start(template) and "n_estimators" in params:
+        estimator, how = previous, "grown"
+        grow = max(1, int(previous.n_estimators * GROW_FRACTION))
+        estimator.set_params(warm_start=True, n_estimators=previous.n_estimators + grow)
+        estimator.fit(X, y)
+        estimator.set_params(warm_start=False)
+    elif usable and supports_warm_start(template):
+        estimator, how = previous, "warm start"
+        estimator.set_params(warm_start=True)
+        estimator.fit(X, y)
+        estimator.set_params(warm_start=False)
+    else:
+        estimator, how = clone(template), "full"
+        estimator.fit(X, y)
+    return name, estimator, how, time.perf_counter() - start
+
+
+def publish(artifacts, paths=REGISTERED_PATHS, manifest_path=MANIFEST_PATH):
+    """Atomically replaces the .joblib artifacts and their manifest entries.
+
+    Every artifact is written and hashed before any is moved into place, so
+    the manifest follows within moments; processes holding the old files
+    keep reading them.
+    """
+    manifest = read_manifest(manifest_path)
+    staged = []
+    for name, artifact in artifacts.items():
+        target = converted_path(paths[name])
+        tmp_path = f"{target}.{os.getpid()}.tmp"
+        joblib.dump(artifact, tmp_path, compress=0)
+        # The .pkl it supersedes, so a later replacement of that .pkl still wins
+        source = paths[name]
+        manifest["artifacts"][name] = {**describe_artifact(tmp_path, manifest_path), "path": target,
+                                       "source_sha256": file_sha256(source) if os.path.exists(source) else None}
+        staged.append((tmp_path, target))
+    for tmp_path, target in staged:
+        os.replace(tmp_path, target)
+    write_manifest(manifest, manifest_path)
+    return manifest
+
+
+def retrain(data_paths=(DATASET_PATH,), names=None, full=False, jobs=None, dry_run=False):
+    """Refits the pipeline and the named candidates (all by default). Returns a report per model.
+
+    A full run refits the preprocessor, which changes the feature space every
+    fitted model depends on, so it must retrain all registered models.
+    """
+    names = list(names or REGISTERED_PATHS)
+    if full and set(names) != set(REGISTERED_PATHS):
+        raise ValueError("a full retrain refits the preprocessor and must retrain every model; "
+                         "drop --model or --full")
+    # Loaded without memory-mapping, since warm starts change them in place
+    pipeline = read_artifact(REGISTERED_PATHS[PIPELINE_NAME], mmap_mode=None)
+    columns = list(pipeline.feature_names_in_)
+    features, y, data_version = load_training_data(data_paths, columns)
+
+    preprocessor, X, y = preprocess(pipeline[:-1], features, y, data_version, fit=full)
+    candidates = {}
+    for name in names:
+        previous = pipeline.steps[-1][1] if name == PIPELINE_NAME else read_artifact(REGISTERED_PATHS[name],
+                                                                                     mmap_mode=None)
+        try:
+            candidates[name] = (template_for(name, previous), previous)
+        except TypeError as e:
+            print(f"Skipping {e}")
+
+    # The transformed matrix is shared with the worker processes, memory-mapped
+    results = Parallel(n_jobs=jobs or default_jobs(), max_nbytes="1M")(
+        delayed(fit_candidate)(name, template, previous, X, y, warm=not full)
+        for name, (template, previous) in candidates.items())
+
+    artifacts, report = {}, []
+    for name, estimator, how, seconds in results:
+        report.append({"name": name, "fit": how, "seconds": seconds, "rows": len(y),
+                       "accuracy": float((estimator.predict(X) == y).mean())})
+        if name == PIPELINE_NAME:
+            estimator = Pipeline([*preprocessor.steps, (pipeline.steps[-1][0], estimator)])
+        artifacts[name] = estimator
+    if not dry_run:
+        publish(artifacts)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retrain the registered models and publish them")
+    parser.add_argument("--data", action="append", default=[],
+                        help="extra labelled CSV (repeatable); data/train_set.csv is always included")
+    parser.add_argument("--model", action="append", choices=list(REGISTERED_PATHS),
+                        help="model to retrain (repeatable, default: all)")
+    parser.add_argument("--full", action="store_true", help="refit the preprocessor and every model from scratch (all models only)")
+    parser.add_argument("--jobs", type=int, help="candidates fitted in parallel (default: CHURN_RETRAIN_JOBS or all cores)")
+    parser.add_argument("--dry-run", action="store_true", help="fit and report without publishing")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        report = retrain([DATASET_PATH, *args.data], args.model, args.full, args.jobs, args.dry_run)
+    except ValueError as e:
+        parser.error(str(e))
+    for entry in report:
+        print(f"{entry['name']:<20} {entry['fit']:<12} {entry['seconds']:>7.2f} s  "
+              f"{entry['rows']:,} rows  training accuracy {entry['accuracy']:.3f}")
+    print(f"{'Dry run' if args.dry_run else 'Published'} in {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder
+
+# Scoring helpers shared by the Predict page and the bulk tooling. Everything
+# here is free of Streamlit calls so it can run outside the script thread.
+
+PREDICTION_COLUMN = "Predictions"
+PROBABILITY_COLUMN = "Churned Probability"
+DEFAULT_CHUNK_SIZE = 50_000
+
+PIPELINE_PATH = os.path.join("models", "pipelist.pkl")
+# Uncompressed joblib dumps, whose arrays can be memory-mapped
+ARTIFACT_SUFFIX = ".joblib"
+MIN_SHARD_ROWS = 2_000
+
+
+def converted_path(path):
+    """Path of the memory-mappable copy written by `python registry.py convert`."""
+    return os.path.splitext(path)[0] + ARTIFACT_SUFFIX
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def resolve_artifact(path, manifest_path=None):
+    """The converted .joblib copy of path if the manifest registers it for the current path, else path.
+
+    Manifest entries of converted copies record the sha256 of the .pkl they
+    replace, so a .pkl changed since then is loaded instead until
+    `python registry.py convert` runs again. The manifest defaults to the
+    one next to the artifact.
+    """
+    converted = converted_path(path)
+    if converted == path or not os.path.exists(converted):
+        return path
+    if not os.path.exists(path):
+        return converted  # only the converted copy exists
+    manifest_path = manifest_path or os.path.join(os.path.dirname(path), "manifest.json")
+    try:
+        with open(manifest_path) as file:
+            entries = json.load(file)["artifacts"].values()
+    except (OSError, ValueError, KeyError):
+        return path
+    entry = next((entry for entry in entries
+                  if os.path.normpath(entry["path"]) == os.path.normpath(converted)), None)
+    if entry is None:
+        return path
+    source = entry.get("source_sha256")
+    return converted if source is None or source == file_sha256(path) else path
+
+
+def read_artifact(path, mmap_mode="c"):
+    """Loads a model artifact, preferring an up-to-date converted .joblib copy.
+
+    Arrays in a converted artifact are memory-mapped copy-on-write, so every
+    process that loads it shares the same pages through the OS page cache
+    while estimators that need writable buffers (libsvm's SVC) still work.
+    """
+    path = resolve_artifact(path)
+    # pickle.load stops at the first array record of a joblib dump and
+    # returns that array instead of the estimator
+    return joblib.load(path, mmap_mode=mmap_mode)
+
+
+def score_frame(pipeline, frame):
+    """Scores a frame in a single pass, returning labels and churn probability (%)."""
+    probability = pipeline.predict_proba(frame)[:, 1]
+    # predict() takes the argmax class, so churn wins only strictly above 0.5
+    labels = np.where(probability > 0.5, 'Churn', 'Not Churn')
+    return labels, probability * 100
+
+
+def add_predictions(frame, labels, probability):
+    """Attaches prediction columns to a frame in place and returns it."""
+    frame[PREDICTION_COLUMN] = labels
+    frame[PROBABILITY_COLUMN] = probability
+    return frame
+
+
+def stream_bulk_predictions(source, pipeline, result_file, quarantine_file, schema,
+                            chunksize=DEFAULT_CHUNK_SIZE, on_chunk=None):
+    """Validates and scores a CSV chunk by chunk, appending each scored chunk to result_file.
+
+    Only one chunk is held in memory at a time. Rows failing schema.validate()
+    are written to quarantine_file, with their errors, instead of being scored.
+    on_chunk(chunk, rows_done) is called after every chunk is written.
+    Returns (rows scored, rows quarantined).
+    """
+    rows_done = rows_quarantined = 0
+    with open(result_file, "w", newline="") as out, open(quarantine_file, "w", newline="") as bad:
+        for index, chunk in enumerate(pd.read_csv(source, chunksize=chunksize)):
+            clean, quarantined, _ = schema.validate(chunk, first_row=rows_done + rows_quarantined)
+            if len(clean):
+                add_predictions(clean, *score_frame(pipeline, clean))
+                clean.to_csv(out, header=rows_done == 0, index=False)
+            if len(quarantined):
+                quarantined.to_csv(bad, header=rows_quarantined == 0, index=False)
+            rows_done += len(clean)
+            rows_quarantined += len(quarantined)
+            if on_chunk is not None:
+                on_chunk(chunk, rows_done)
+    return rows_done, rows_quarantined
+
+
+def default_workers():
+    """Worker count for the scoring pool, from CHURN_SCORING_WORKERS or the CPU count."""
+    return int(os.environ.get("CHURN_SCORING_WORKERS", 0)) or os.cpu_count() or 1
+
+
+# Per-process pipeline, loaded once by the pool initializer
+_worker_pipeline = None
+
+
+def _init_worker(pipeline_path):
+    global _worker_pipeline
+    _worker_pipeline = read_artifact(pipeline_path)
+
+
+def _predict_proba_shard(shard):
+    return _worker_pipeline.predict_proba(shard)
+
+
+class ScoringEngine:
+    """Process pool that shards bulk frames across workers holding the pipeline.
+
+    Exposes predict_proba() so it can stand in for the pipeline anywhere a
+    frame is scored, e.g. score_frame() and stream_bulk_predictions().
+    """
+
+    def __init__(self, pipeline_path=PIPELINE_PATH, workers=None, min_shard_rows=MIN_SHARD_ROWS):
+        self.pipeline_path = pipeline_path
+        self.workers = workers or default_workers()
+        self.min_shard_rows = min_shard_rows
+        # spawn rather than fork: the Streamlit server process is multi-threaded
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(pipeline_path,),
+        )
+
+    def _shards(self, frame):
+        shard_rows = max(self.min_shard_rows, -(-len(frame) // self.workers))
+        return [frame.iloc[start:start + shard_rows] for start in range(0, len(frame), shard_rows)]
+
+    def predict_proba(self, frame):
+        # map() yields results in submission order, so rows stay aligned
+        return np.vstack(list(self._executor.map(_predict_proba_shard, self._shards(frame))))
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+class SingleRowScorer:
+    """Scores one record at a time without building a DataFrame per request.
+
+    One-hot encoded columns are compiled into lookup tables and the remaining
+    transformers run on a preallocated one-row frame, so the classifier sees a
+    single feature vector. Pipelines that cannot be compiled fall back to a
+    preallocated one-row template of the full input. Either way the
+    preprocessor runs once and label and probability come from one
+    predict_proba call.
+    """
+
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+        self.columns = list(pipeline.feature_names_in_)
+        self._lock = threading.Lock()
+        self._template = pd.DataFrame([[None] * len(self.columns)], columns=self.columns, dtype=object)
+        self.compiled = self._compile()
+
+    def _compile(self):
+        steps = getattr(self.pipeline, "steps", [])
+        if len(steps) != 2 or not isinstance(steps[0][1], ColumnTransformer):
+            return False
+        preprocessor, self._classifier = steps[0][1], steps[1][1]
+        position = {col: index for index, col in enumerate(self.columns)}
+
+        # Each block maps input columns onto a slice of the feature vector
+        self._onehot, self._dense, offset = [], [], 0
+        for name, transformer, cols in preprocessor.transformers_:
+            if transformer == "drop" or len(cols) == 0:
+                continue
+            if not all(isinstance(col, str) and col in position for col in cols):
+                return False
+            encoder = transformer
+            if isinstance(transformer, Pipeline) and len(transformer.steps) == 1:
+                encoder = transformer.steps[0][1]
+            if (isinstance(encoder, OneHotEncoder) and encoder.handle_unknown == "ignore"
+                    and encoder.drop_idx_ is None and not getattr(encoder, "_infrequent_enabled", False)):
+                for col, categories in zip(cols, encoder.categories_):
+                    lookup = {value: offset + index for index, value in enumerate(categories)}
+                    self._onehot.append((position[col], lookup))
+                    offset += len(categories)
+            elif transformer == "passthrough":
+                return False
+            else:
+                frame = pd.DataFrame([[0.0] * len(cols)], columns=list(cols))
+                width = transformer.transform(frame).shape[1]
+                self._dense.append(([position[col] for col in cols], transformer, frame, offset, width))
+                offset += width
+        self._vector = np.zeros((1, offset))
+
+        # Only trust the compiled layout if it reproduces the preprocessor
+        probe = [0.0] * len(self.columns)
+        for position, lookup in self._onehot:
+            probe[position] = next(iter(lookup))
+        expected = preprocessor.transform(pd.DataFrame([probe], columns=self.columns))
+        return expected.shape == self._vector.shape and np.allclose(self._transform(probe), expected)
+
+    def _transform(self, values):
+        vector = self._vector
+        vector[:] = 0.0
+        for position, lookup in self._onehot:
+            index = lookup.get(values[position])
+            if index is not None:
+                vector[0, index] = 1.0
+        for positions, transformer, frame, offset, width in self._dense:
+            for column, position in enumerate(positions):
+                frame.iat[0, column] = values[position]
+            vector[0, offset:offset + width] = transformer.transform(frame)
+        return vector
+
+    def score(self, record):
+        """Returns (label, churn probability in %) for a dict or a tuple in self.columns order."""
+        values = [record[col] for col in self.columns] if isinstance(record, dict) else list(record)
+        with self._lock:
+            if self.compiled:
+                probability = self._classifier.predict_proba(self._transform(values))[0, 1]
+            else:
+                for index, value in enumerate(values):
+                    self._template.iat[0, index] = value
+                probability = self.pipeline.predict_proba(self._template)[0, 1]
+        return ('Churn' if probability > 0.5 else 'Not Churn'), probability * 100
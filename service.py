@@ -0,0 +1,261 @@
+import argparse
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+from scoring import PIPELINE_PATH, read_artifact, score_frame
+from validation import ERROR_COLUMN, ROW_COLUMN, UploadSchema
+
+# Local HTTP scoring service around the same pipeline artifact the Predict
+# page uses. Concurrent single-record requests are coalesced into
+# micro-batches so the pipeline scores one DataFrame per batch.
+#
+#   POST /predict        {"Gender": "Male", ...}           -> {"prediction": ..., "probability": ...}
+#   POST /predict/batch  {"records": [{...}, {...}]}       -> {"predictions": [...]}
+#   GET  /health                                           -> {"status": "ok", "queued": n}
+#
+# Probabilities are churn probabilities in percent, as on the Predict page.
+# Records are validated like bulk uploads (validation.py) before scoring, so
+# a bad value fails only its own record: /predict answers 400, and
+# /predict/batch returns {"error": ...} in that record's place.
+
+DEFAULT_MAX_BATCH_SIZE = 64
+DEFAULT_MAX_WAIT_MS = 5
+DEFAULT_MAX_QUEUE = 1024
+REQUEST_TIMEOUT = 30
+
+
+def _results(labels, probability):
+    return [{"prediction": str(label), "probability": float(prob)}
+            for label, prob in zip(labels, probability)]
+
+
+class RecordError(ValueError):
+    """A record that failed validation; the HTTP layer answers 400."""
+
+
+def score_records(pipeline, schema, records):
+    """Scores a list of records, returning a result or a RecordError per record, in order.
+
+    Invalid records are set aside before scoring. Should scoring the valid
+    ones still fail, they are rescored one at a time so the error stays with
+    the record that caused it.
+    """
+    frame = pd.DataFrame.from_records(records, columns=schema.columns)
+    clean, quarantined, _ = schema.validate(frame)
+    results = [None] * len(records)
+    for row, message in zip(quarantined[ROW_COLUMN], quarantined[ERROR_COLUMN]):
+        results[row] = RecordError(message)
+    positions = [index for index, result in enumerate(results) if result is None]
+    if not positions:
+        return results
+    try:
+        scored = _results(*score_frame(pipeline, clean))
+    except Exception:
+        if len(positions) == 1:
+            raise
+        scored = []
+        for position in range(len(clean)):
+            try:
+                scored.append(_results(*score_frame(pipeline, clean.iloc[position:position + 1]))[0])
+            except Exception as e:
+                scored.append(e)
+    for position, result in zip(positions, scored):
+        results[position] = result
+    return results
+
+
+class MicroBatcher:
+    """Coalesces single records into batches scored by one background thread.
+
+    A batch is flushed when it reaches max_batch_size or when its first record
+    has waited max_wait_ms. submit() raises queue.Full once max_queue records
+    are waiting, which the HTTP layer turns into a 503.
+    """
+
+    def __init__(self, pipeline, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                 max_wait_ms=DEFAULT_MAX_WAIT_MS, max_queue=DEFAULT_MAX_QUEUE):
+        self.pipeline = pipeline
+        self.schema = UploadSchema.from_pipeline(pipeline)
+        self.columns = self.schema.columns
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def qsize(self):
+        return self._queue.qsize()
+
+    def submit(self, record):
+        """Queues one record and returns a Future for its result."""
+        future = Future()
+        self._queue.put_nowait((record, future))
+        return future
+
+    def close(self):
+        self._queue.put((None, None))
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first[0] is None:
+                return
+            batch = [first]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item[0] is None:
+                    self._score(batch)
+                    return
+                batch.append(item)
+            self._score(batch)
+
+    def _score(self, batch):
+        try:
+            results = score_records(self.pipeline, self.schema, [record for record, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+class ScoringHandler(BaseHTTPRequestHandler):
+    # Set by serve()
+    batcher = None
+    verbose = False
+
+    def _send(self, status, body):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"null")
+
+    def _check_record(self, record):
+        if not isinstance(record, dict):
+            return "record must be a JSON object"
+        missing = [col for col in self.batcher.columns if col not in record]
+        if missing:
+            return f"record is missing fields: {', '.join(missing)}"
+        return None
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send(200, {"status": "ok", "queued": self.batcher.qsize()})
+        else:
+            self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        try:
+            body = self._read_json()
+        except ValueError:
+            self._send(400, {"error": "request body is not valid JSON"})
+            return
+
+        if self.path == "/predict":
+            error = self._check_record(body)
+            if error:
+                self._send(400, {"error": error})
+                return
+            try:
+                future = self.batcher.submit(body)
+            except queue.Full:
+                self._send(503, {"error": "scoring queue is full"})
+                return
+            try:
+                self._send(200, future.result(timeout=REQUEST_TIMEOUT))
+            except FutureTimeout:
+                self._send(504, {"error": "scoring timed out"})
+            except RecordError as e:
+                self._send(400, {"error": str(e)})
+            except Exception as e:
+                self._send(500, {"error": str(e)})
+
+        elif self.path == "/predict/batch":
+            records = body.get("records") if isinstance(body, dict) else None
+            if not isinstance(records, list):
+                self._send(400, {"error": "body must be {\"records\": [...]}"})
+                return
+            for index, record in enumerate(records):
+                error = self._check_record(record)
+                if error:
+                    self._send(400, {"error": f"records[{index}]: {error}"})
+                    return
+            # Batch requests are already vectorised, so they skip the queue
+            try:
+                results = score_records(self.batcher.pipeline, self.batcher.schema, records) if records else []
+            except Exception as e:
+                self._send(500, {"error": str(e)})
+                return
+            self._send(200, {"predictions": [{"error": str(result)} if isinstance(result, Exception) else result
+                                             for result in results]})
+
+        else:
+            self._send(404, {"error": "not found"})
+
+    def log_message(self, format, *args):
+        # Per-request logging costs more than scoring at high request rates
+        if self.verbose:
+            super().log_message(format, *args)
+
+
+class ScoringServer(ThreadingHTTPServer):
+    # socketserver's default backlog of 5 resets bursts of concurrent clients
+    request_queue_size = 1024
+
+
+def serve(host="127.0.0.1", port=8000, pipeline_path=PIPELINE_PATH,
+          max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait_ms=DEFAULT_MAX_WAIT_MS,
+          max_queue=DEFAULT_MAX_QUEUE, verbose=False):
+    """Runs the scoring service until interrupted."""
+    batcher = MicroBatcher(read_artifact(pipeline_path), max_batch_size, max_wait_ms, max_queue)
+    handler = type("Handler", (ScoringHandler,), {"batcher": batcher, "verbose": verbose})
+    server = ScoringServer((host, port), handler)
+    print(f"Scoring service listening on http://{host}:{port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        batcher.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local churn scoring service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--pipeline", default=PIPELINE_PATH)
+    parser.add_argument("--max-batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT_MS)
+    parser.add_argument("--max-queue", type=int, default=DEFAULT_MAX_QUEUE)
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.pipeline, args.max_batch_size,
+          args.max_wait_ms, args.max_queue, args.verbose)
+
+
+if __name__ == "__main__":
+    main()
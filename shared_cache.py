@@ -0,0 +1,167 @@
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+# Cross-process cache tier for multi-worker deployments. When
+# CHURN_SHARED_CACHE names a SQLite file, expensive results - dashboard
+# aggregates, out-of-core scans and rendered figures - are stored there by
+# whichever worker computes them first and read back by the others, on top
+# of each process's own st.cache_* and LRU caches. The database runs in WAL
+# mode so readers never block the writer, and it is trimmed to
+# CHURN_SHARED_CACHE_MB, least recently used entries first. A hit records
+# its access time at most once per TOUCH_SECONDS, so hits are reads and
+# don't queue on SQLite's single write lock. A miss claims its key before
+# computing, and other workers missing the same key wait for that result
+# instead of computing it again. Unset, every call simply computes.
+#
+# Datasets and models are shared without this tier: the Parquet copy of
+# the dataset and the converted .joblib artifacts are memory-mapped from
+# disk, so workers share their pages through the OS page cache, and bulk
+# predictions use the SQLite tier of prediction_cache.
+
+PATH = os.environ.get("CHURN_SHARED_CACHE", "")
+MAX_BYTES = int(os.environ.get("CHURN_SHARED_CACHE_MB", 512)) * 1024 * 1024
+TRIM_EVERY = 32  # puts between size checks
+TRIM_TO = 0.9  # fraction of MAX_BYTES left after a trim
+TOUCH_SECONDS = 60  # resolution of the LRU access times
+CLAIM_SECONDS = 300  # a claim older than this is taken over, e.g. after a crash
+CLAIM_POLL_SECONDS = 0.05
+
+_MISSING = object()
+
+
+def enabled():
+    return bool(PATH)
+
+
+def cache_key(*parts):
+    """Stable key for a tuple of reprs, e.g. (path, version, filters)."""
+    return hashlib.sha256(repr(parts).encode()).hexdigest()
+
+
+class SharedCache:
+    """Pickled values in one SQLite file, shared by every process that opens it."""
+
+    def __init__(self, path, max_bytes=MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._puts = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        db = self._connection()
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("CREATE TABLE IF NOT EXISTS entries (namespace TEXT, key TEXT, value BLOB, size INTEGER, "
+                   "accessed REAL, PRIMARY KEY (namespace, key)) WITHOUT ROWID")
+        db.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+        db.execute("CREATE TABLE IF NOT EXISTS claims (namespace TEXT, key TEXT, expires REAL, "
+                   "PRIMARY KEY (namespace, key)) WITHOUT ROWID")
+
+    def _connection(self):
+        # sqlite3 connections belong to the thread that opened them
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def get(self, namespace, key, default=None):
+        db = self._connection()
+        row = db.execute("SELECT value, accessed FROM entries WHERE namespace = ? AND key = ?",
+                         (namespace, key)).fetchone()
+        if row is None:
+            return default
+        now = time.time()
+        if now - row[1] > TOUCH_SECONDS:
+            db.execute("UPDATE entries SET accessed = ? WHERE namespace = ? AND key = ?", (now, namespace, key))
+        return pickle.loads(row[0])
+
+    def put(self, namespace, key, value):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(blob) > self.max_bytes:
+            return
+        db = self._connection()
+        db.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                   (namespace, key, blob, len(blob), time.time()))
+        self._puts += 1
+        if self._puts % TRIM_EVERY == 0:
+            self.trim()
+
+    def claim(self, namespace, key, seconds=CLAIM_SECONDS):
+        """Claims key for computing. False while another caller holds an unexpired claim."""
+        db = self._connection()
+        now = time.time()
+        db.execute("DELETE FROM claims WHERE namespace = ? AND key = ? AND expires < ?", (namespace, key, now))
+        return db.execute("INSERT OR IGNORE INTO claims VALUES (?, ?, ?)",
+                          (namespace, key, now + seconds)).rowcount == 1
+
+    def release(self, namespace, key):
+        self._connection().execute("DELETE FROM claims WHERE namespace = ? AND key = ?", (namespace, key))
+
+    def trim(self):
+        """Deletes least recently used entries until the cache fits in TRIM_TO of max_bytes."""
+        db = self._connection()
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - int(self.max_bytes * TRIM_TO)
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            freed = 0
+            for namespace, key, size in db.execute(
+                    "SELECT namespace, key, size FROM entries ORDER BY accessed").fetchall():
+                if freed >= excess:
+                    break
+                db.execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key))
+                freed += size
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    def info(self):
+        rows, size = self._connection().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {"entries": rows, "bytes": size, "max_bytes": self.max_bytes}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """The process's SharedCache, or None when CHURN_SHARED_CACHE is unset."""
+    global _cache
+    if not enabled():
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = SharedCache(PATH)
+        return _cache
+
+
+def get_or_compute(namespace, key, compute):
+    """Returns the shared value for key, computing and storing it on a miss."""
+    cache = get_cache()
+    if cache is None:
+        return compute()
+    value = cache.get(namespace, key, _MISSING)
+    if value is not _MISSING:
+        return value
+    # Wait while another worker computes the key; take over if it gives up
+    while not cache.claim(namespace, key):
+        time.sleep(CLAIM_POLL_SECONDS)
+        value = cache.get(namespace, key, _MISSING)
+        if value is not _MISSING:
+            return value
+    try:
+        # The previous claim holder may have stored it just before we claimed
+        value = cache.get(namespace, key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            cache.put(namespace, key, value)
+    finally:
+        cache.release(namespace, key)
+    return value
@@ -0,0 +1,228 @@
+import hashlib
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from dataset import CACHE_DIR, DATASET_PATH, dataset_version, load_dataset, read_csv_typed
+
+# Per-column summary statistics for the Data page, in the layout of
+# describe(include="all"). Summaries are mergeable: numeric columns keep
+# count/mean/M2 moments and a quantile sketch, other columns keep value
+# counts. The summary of each dataset version is stored next to the Parquet
+# cache, and a CSV that only had rows appended is summarised by reading
+# just the new rows and merging them in.
+SKETCH_SIZE = 4096
+QUANTILES = (0.25, 0.5, 0.75)
+ROWS = ["count", "unique", "top", "freq", "mean", "std", "min", "25%", "50%", "75%", "max"]
+
+
+class NumericSummary:
+    """Count, mean, variance, extremes and a quantile sketch of one numeric column.
+
+    The sketch holds (value, weight) centroids. It is exact while the column
+    has at most SKETCH_SIZE distinct values and is compressed into
+    SKETCH_SIZE equal-weight centroids beyond that.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.values = np.empty(0)
+        self.weights = np.empty(0)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return self
+        batch = NumericSummary()
+        batch.count = len(values)
+        batch.mean = float(values.mean())
+        batch.m2 = float(((values - batch.mean) ** 2).sum())
+        batch.min, batch.max = float(values.min()), float(values.max())
+        batch.values, counts = np.unique(values, return_counts=True)
+        batch.weights = counts.astype(float)
+        batch._compress()
+        return self.merge(batch)
+
+    def merge(self, other):
+        if not other.count:
+            return self
+        count = self.count + other.count
+        # Chan et al.'s pairwise update of the mean and sum of squared deviations
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / count
+        self.count = count
+        self.min, self.max = min(self.min, other.min), max(self.max, other.max)
+
+        values, inverse = np.unique(np.concatenate([self.values, other.values]), return_inverse=True)
+        self.weights = np.bincount(inverse, weights=np.concatenate([self.weights, other.weights]))
+        self.values = values
+        self._compress()
+        return self
+
+    def _compress(self):
+        if len(self.values) <= SKETCH_SIZE:
+            return
+        cumulative = np.cumsum(self.weights)
+        midpoints = (cumulative - self.weights / 2) / cumulative[-1]
+        buckets = np.minimum((midpoints * SKETCH_SIZE).astype(int), SKETCH_SIZE - 1)
+        weights = np.bincount(buckets, weights=self.weights, minlength=SKETCH_SIZE)
+        sums = np.bincount(buckets, weights=self.values * self.weights, minlength=SKETCH_SIZE)
+        keep = weights > 0
+        self.values, self.weights = sums[keep] / weights[keep], weights[keep]
+
+    def std(self):
+        return float(np.sqrt(self.m2 / (self.count - 1))) if self.count > 1 else np.nan
+
+    def quantile(self, q):
+        """Linear interpolation between order statistics, as pandas does."""
+        if not self.count:
+            return np.nan
+        cumulative = np.cumsum(self.weights)
+        rank = q * (self.count - 1)
+        low, high = np.searchsorted(cumulative, [np.floor(rank), np.ceil(rank)], side="right")
+        low_value = self.values[min(low, len(self.values) - 1)]
+        high_value = self.values[min(high, len(self.values) - 1)]
+        value = low_value + (high_value - low_value) * (rank - np.floor(rank))
+        return float(np.clip(value, self.min, self.max))
+
+    def describe(self):
+        return {"count": self.count, "mean": self.mean if self.count else np.nan, "std": self.std(),
+                "min": self.min if self.count else np.nan,
+                **{f"{q:.0%}": self.quantile(q) for q in QUANTILES},
+                "max": self.max if self.count else np.nan}
+
+
+class CategoricalSummary:
+    """Value counts of one non-numeric column."""
+
+    def __init__(self):
+        self.counts = pd.Series(dtype="int64")
+
+    def update(self, values):
+        counts = pd.Series(values).value_counts(dropna=True)
+        batch = CategoricalSummary()
+        batch.counts = counts[counts > 0].astype("int64")
+        batch.counts.index = batch.counts.index.astype(object)
+        return self.merge(batch)
+
+    def merge(self, other):
+        self.counts = self.counts.add(other.counts, fill_value=0).astype("int64")
+        return self
+
+    def describe(self):
+        if self.counts.empty:
+            return {"count": 0, "unique": 0}
+        return {"count": int(self.counts.sum()), "unique": len(self.counts),
+                "top": self.counts.idxmax(), "freq": int(self.counts.max())}
+
+
+def _is_numeric(values):
+    return pd.api.types.is_numeric_dtype(values.dtype) and not isinstance(values.dtype, pd.CategoricalDtype)
+
+
+class DatasetSummary:
+    """Mergeable per-column summaries of a frame, built up batch by batch."""
+
+    def __init__(self):
+        self.columns = {}
+
+    def update(self, data):
+        for column in data.columns:
+            summary = self.columns.get(column)
+            if summary is None:
+                summary = NumericSummary() if _is_numeric(data[column]) else CategoricalSummary()
+                self.columns[column] = summary
+            summary.update(data[column])
+        return self
+
+    def merge(self, other):
+        for column, summary in other.columns.items():
+            if column in self.columns:
+                self.columns[column].merge(summary)
+            else:
+                self.columns[column] = summary
+        return self
+
+    def to_frame(self):
+        """Returns the summaries laid out like describe(include="all")."""
+        table = pd.DataFrame({column: summary.describe() for column, summary in self.columns.items()})
+        return table.reindex([row for row in ROWS if row in table.index])
+
+
+def _summary_path(path):
+    name = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(CACHE_DIR, f"{name}.summary.pkl")
+
+
+def _prefix_sha256(path, size):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        while size > 0:
+            block = file.read(min(1 << 20, size))
+            if not block:
+                break
+            digest.update(block)
+            size -= len(block)
+    return digest.hexdigest()
+
+
+def _read_stored(path):
+    try:
+        with open(_summary_path(path), "rb") as file:
+            return pickle.load(file)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+
+
+def _is_append(path, stored, size):
+    """True if the CSV is the stored version with whole rows appended."""
+    if stored is None or size <= stored["size"]:
+        return False
+    with open(path, "rb") as file:
+        file.seek(stored["size"] - 1)
+        if file.read(1) != b"\n":
+            return False
+    return _prefix_sha256(path, stored["size"]) == stored["sha256"]
+
+
+def build_summary(path=DATASET_PATH):
+    """Returns the DatasetSummary of the CSV, reusing or extending the stored one."""
+    version = dataset_version(path)
+    stored = _read_stored(path)
+    if stored is not None and stored["version"] == version:
+        return stored["summary"]
+
+    size = os.path.getsize(path)
+    if _is_append(path, stored, size):
+        summary = stored["summary"]
+        with open(path, "rb") as file:
+            file.seek(stored["size"])
+            summary.update(read_csv_typed(file, header=None, names=list(summary.columns)))
+    else:
+        summary = DatasetSummary().update(load_dataset(path))
+
+    stored = {"version": version, "size": size, "sha256": _prefix_sha256(path, size), "summary": summary}
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = f"{_summary_path(path)}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as file:
+        pickle.dump(stored, file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, _summary_path(path))
+    return summary
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def _summary_table(path, version):
+    return build_summary(path).to_frame()
+
+
+def load_summary(path=DATASET_PATH):
+    """Returns the describe(include="all")-style table for the current dataset version."""
+    return _summary_table(path, dataset_version(path))
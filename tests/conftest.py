@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The app's modules live at the repository root and open data/ and models/
+# by relative path
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
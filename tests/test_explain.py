@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+from sklearn.base import clone
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.pipeline import Pipeline
+
+from dataset import DATASET_PATH, read_csv_typed
+from explain import Explainer
+from retrain import LABEL_COLUMN, labels
+from scoring import PIPELINE_PATH, read_artifact
+
+SAMPLE_ROWS = 500
+
+
+@pytest.fixture(scope="module")
+def pipeline():
+    return read_artifact(PIPELINE_PATH, mmap_mode=None)
+
+
+@pytest.fixture(scope="module")
+def dataset(pipeline):
+    frame = read_csv_typed(DATASET_PATH)
+    return frame[list(pipeline.feature_names_in_)], labels(frame[LABEL_COLUMN]).to_numpy()
+
+
+def fitted(pipeline, classifier, dataset):
+    """The pipeline's preprocessor with classifier in place of its last step, fitted on the dataset."""
+    features, y = dataset
+    return Pipeline([*clone(pipeline[:-1]).steps, ("classifier", classifier)]).fit(features, y)
+
+
+def raw_output(pipeline, features):
+    # Log-odds for linear models and boosting, churn probability for forests
+    if hasattr(pipeline[-1], "decision_function"):
+        return pipeline.decision_function(features)
+    return pipeline.predict_proba(features)[:, 1]
+
+
+@pytest.mark.parametrize("classifier", [
+    None,  # the published logistic regression pipeline
+    RandomForestClassifier(n_estimators=20, max_depth=6, random_state=0),
+    GradientBoostingClassifier(n_estimators=30, max_depth=3, random_state=0),
+], ids=["LR", "RF", "GB"])
+def test_contributions_add_up_to_the_model_output(pipeline, dataset, classifier):
+    model = pipeline if classifier is None else fitted(pipeline, classifier, dataset)
+    features = dataset[0]
+    explainer = Explainer(model, features)
+    sample = features.sample(SAMPLE_ROWS, random_state=0)
+
+    base, contributions = explainer.contributions(sample)
+
+    assert contributions.shape == (len(sample), len(explainer.columns))
+    np.testing.assert_allclose(base + contributions.sum(axis=1), raw_output(model, sample), rtol=0, atol=1e-12)
+
@@ -0,0 +1,106 @@
+import threading
+import time
+
+import pytest
+
+import shared_cache
+from shared_cache import SharedCache, get_or_compute
+
+# Two SharedCache instances on one file stand in for two worker processes
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "shared.db")
+
+
+@pytest.fixture
+def workers(db_path, monkeypatch):
+    """(this worker's cache, used by get_or_compute; another worker's cache)."""
+    this, other = SharedCache(db_path), SharedCache(db_path)
+    monkeypatch.setattr(shared_cache, "PATH", db_path)
+    monkeypatch.setattr(shared_cache, "_cache", this)
+    return this, other
+
+
+def test_claim_is_exclusive_until_released(workers):
+    this, other = workers
+    assert other.claim("ns", "key")
+    assert not this.claim("ns", "key")
+    assert this.claim("ns", "another key")
+    other.release("ns", "key")
+    assert this.claim("ns", "key")
+
+
+def test_expired_claim_is_taken_over(workers):
+    this, other = workers
+    # The other worker claims and dies without releasing
+    assert other.claim("ns", "key", seconds=0.2)
+    assert not this.claim("ns", "key")
+    time.sleep(0.3)
+    assert this.claim("ns", "key")
+    assert not other.claim("ns", "key")
+
+
+def test_get_or_compute_takes_over_an_abandoned_claim(workers):
+    _, other = workers
+    other.claim("ns", "key", seconds=0.2)
+    start = time.perf_counter()
+    assert get_or_compute("ns", "key", lambda: "computed") == "computed"
+    assert time.perf_counter() - start >= 0.15
+    assert other.get("ns", "key") == "computed"
+
+
+def test_get_or_compute_waits_for_the_claim_holder(workers):
+    _, other = workers
+    other.claim("ns", "key")
+
+    def finish():
+        time.sleep(0.2)
+        other.put("ns", "key", "from the other worker")
+        other.release("ns", "key")
+
+    def compute():
+        raise AssertionError("computed a key another worker was computing")
+
+    thread = threading.Thread(target=finish)
+    thread.start()
+    try:
+        assert get_or_compute("ns", "key", compute) == "from the other worker"
+    finally:
+        thread.join()
+
+
+def test_failing_compute_releases_its_claim(workers):
+    this, other = workers
+
+    def compute():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError, match="boom"):
+        get_or_compute("ns", "key", compute)
+    assert this.get("ns", "key", "missing") == "missing"
+    # Nobody is left waiting on a claim that will never be released
+    assert other.claim("ns", "key")
+    other.release("ns", "key")
+    assert get_or_compute("ns", "key", lambda: 42) == 42
+
+
+def test_trim_drops_least_recently_used_first(db_path, monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(shared_cache.time, "time", lambda: now[0])
+    value = b"x" * 1000
+    cache = SharedCache(db_path, max_bytes=2500)
+    for second, key in enumerate(["a", "b", "c"]):
+        now[0] = float(second)
+        cache.put("ns", key, value)
+    # Reading "a" after TOUCH_SECONDS makes it the most recently used of the three
+    now[0] = 100.0
+    assert cache.get("ns", "a") == value
+    now[0] = 101.0
+    cache.put("ns", "d", value)
+
+    cache.trim()
+
+    assert [key for key in "abcd" if cache.get("ns", key) is not None] == ["a", "d"]
+    assert cache.info()["bytes"] <= 2500 * shared_cache.TRIM_TO
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dataset import DATASET_PATH, read_csv_typed
+from summary_stats import SKETCH_SIZE, DatasetSummary, NumericSummary
+
+CHUNK_ROWS = 700
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    return read_csv_typed(DATASET_PATH)
+
+
+def chunked_summary(frame, rows=CHUNK_ROWS):
+    """Summarises each chunk separately and merges the summaries, as appends do."""
+    summary = DatasetSummary()
+    for start in range(0, len(frame), rows):
+        summary.merge(DatasetSummary().update(frame.iloc[start:start + rows]))
+    return summary
+
+
+def test_merged_moments_match_describe(dataset):
+    table = chunked_summary(dataset).to_frame()
+    expected = dataset.describe()
+    for column in expected.columns:
+        for row in ["count", "mean", "std", "min", "max"]:
+            assert table.loc[row, column] == pytest.approx(expected.loc[row, column], rel=1e-9), (row, column)
+
+
+def test_merged_value_counts_match_describe(dataset):
+    table = chunked_summary(dataset).to_frame()
+    expected = dataset.describe(include="category")
+    for column in expected.columns:
+        for row in ["count", "unique", "freq"]:
+            assert table.loc[row, column] == expected.loc[row, column], (row, column)
+
+
+def test_sketch_is_exact_below_sketch_size(dataset):
+    # Tenure has far fewer than SKETCH_SIZE distinct values
+    table = chunked_summary(dataset).to_frame()
+    expected = dataset.describe()
+    for row in ["25%", "50%", "75%"]:
+        assert table.loc[row, "Tenure"] == expected.loc[row, "Tenure"]
+
+
+@pytest.mark.parametrize("distribution", ["normal", "lognormal", "exponential"])
+def test_sketch_quantiles_within_rank_error(distribution):
+    # Compressed centroids each hold about 1/SKETCH_SIZE of the rows, so an
+    # estimated quantile is within that share of rows of the exact one
+    values = getattr(np.random.default_rng(0), distribution)(size=300_000)
+    summary = NumericSummary()
+    for chunk in np.array_split(values, 97):
+        summary.update(chunk)
+    ordered = np.sort(values)
+    for q in np.linspace(0.01, 0.99, 99):
+        rank = np.searchsorted(ordered, summary.quantile(q)) / len(ordered)
+        assert abs(rank - q) <= 1 / SKETCH_SIZE, q
+
+
+def test_merge_of_empty_summary_is_a_no_op():
+    summary = NumericSummary().update([1.0, 2.0, 4.0])
+    summary.merge(NumericSummary())
+    assert (summary.count, summary.mean, summary.min, summary.max) == (3, pytest.approx(7 / 3), 1.0, 4.0)
+    assert summary.std() == pytest.approx(pd.Series([1.0, 2.0, 4.0]).std())
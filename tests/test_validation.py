@@ -0,0 +1,80 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scoring import PIPELINE_PATH, read_artifact
+from validation import ERROR_COLUMN, ROW_COLUMN, UploadSchema
+
+# The first rows of a bulk prediction export; data/bulk_predictions.csv itself
+# is overwritten by every bulk run on the Predict page
+BULK_PATH = os.path.join(os.path.dirname(__file__), "data", "bulk_upload.csv")
+
+
+@pytest.fixture(scope="module")
+def pipeline():
+    return read_artifact(PIPELINE_PATH)
+
+
+@pytest.fixture(scope="module")
+def schema(pipeline):
+    return UploadSchema.from_pipeline(pipeline)
+
+
+@pytest.fixture
+def upload():
+    # Lower-case "gender" and "tenure", 0/1 SeniorCitizen and True/False flags
+    return pd.read_csv(BULK_PATH)
+
+
+def test_aliases_are_normalized(schema, upload):
+    clean, quarantined, errors = schema.validate(upload)
+    assert len(clean) == len(upload) and quarantined.empty and errors.empty
+    assert {"Gender", "Tenure"} <= set(clean.columns) and not {"gender", "tenure"} & set(clean.columns)
+    # Extra upload columns are kept
+    assert {"Churn", "Predictions"} <= set(clean.columns)
+    for column in ["SeniorCitizen", "PhoneService", "PaperlessBilling"]:
+        assert set(clean[column]) <= set(schema.domains[column]), column
+    assert clean["SeniorCitizen"].eq(upload["SeniorCitizen"].map({0: "No", 1: "Yes"})).all()
+    assert clean["Tenure"].eq(upload["tenure"]).all()
+
+
+def test_bad_rows_are_quarantined_and_reported(pipeline, schema, upload):
+    upload["TotalCharges"] = upload["TotalCharges"].astype(object)
+    upload.loc[3, "TotalCharges"] = "abc"
+    upload.loc[10, "gender"] = "Robot"
+    upload.loc[20, "tenure"] = -5
+    upload.loc[30, "MonthlyCharges"] = np.nan
+    upload.loc[30, "Contract"] = "Weekly"
+
+    clean, quarantined, errors = schema.validate(upload)
+
+    assert quarantined[ROW_COLUMN].tolist() == [3, 10, 20, 30]
+    assert len(clean) == len(upload) - 4 and not clean.index.isin([3, 10, 20, 30]).any()
+    # Quarantined rows are kept as uploaded
+    assert quarantined.loc[3, "TotalCharges"] == "abc" and quarantined.loc[10, "gender"] == "Robot"
+    assert quarantined.loc[3, ERROR_COLUMN] == "TotalCharges: not a number"
+    assert quarantined.loc[20, ERROR_COLUMN] == "Tenure: negative value"
+    assert "MonthlyCharges: missing value" in quarantined.loc[30, ERROR_COLUMN]
+    assert "Contract: not one of" in quarantined.loc[30, ERROR_COLUMN]
+
+    assert list(errors.columns) == [ROW_COLUMN, "column", "value", "error"]
+    assert errors[ROW_COLUMN].tolist() == [3, 10, 20, 30, 30]
+    assert errors.loc[errors[ROW_COLUMN] == 10, "value"].item() == "Robot"
+    assert errors.loc[errors["column"] == "Gender", "error"].item().startswith("not one of")
+
+    # Everything left passes the pipeline
+    probability = pipeline.predict_proba(clean[schema.columns])[:, 1]
+    assert len(probability) == len(clean) and np.isfinite(probability).all()
+
+
+def test_row_numbers_are_offset_by_first_row(schema, upload):
+    upload.loc[105, "gender"] = "Robot"
+    _, quarantined, errors = schema.validate(upload.iloc[100:200], first_row=100)
+    assert quarantined[ROW_COLUMN].tolist() == [105] and errors[ROW_COLUMN].tolist() == [105]
+
+
+def test_missing_column_raises(schema, upload):
+    with pytest.raises(ValueError, match="Contract"):
+        schema.validate(upload.drop(columns="Contract"))
@@ -0,0 +1,151 @@
+import re
+
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder
+
+# Validation and normalization of bulk uploads before scoring. Column names
+# are matched to the pipeline's training schema regardless of case, spaces
+# and underscores ("gender" -> "Gender"), numeric columns are coerced, and
+# categorical values are checked against the categories the pipeline was
+# trained on. Every check is a vectorized mask over the frame, or a lookup
+# over a column's distinct values, so a batch is scanned once; rows that
+# fail any check are quarantined with one error record per failed cell and
+# the rest are scored.
+
+ERROR_COLUMN = "Errors"
+ROW_COLUMN = "Row"
+# Spellings the training data folded into its categories
+VALUE_ALIASES = {
+    "0": "No", "1": "Yes", "false": "No", "true": "Yes",
+    "no phone service": "No", "no internet service": "No",
+}
+
+
+def _name_key(name):
+    return re.sub(r"[\s_]+", "", str(name)).lower()
+
+
+def _value_key(value):
+    if isinstance(value, (float, np.floating)) and float(value).is_integer():
+        value = int(value)
+    return str(value).strip().lower()
+
+
+class UploadSchema:
+    """Input columns, numeric columns and trained categories of a pipeline."""
+
+    def __init__(self, columns, numeric, domains):
+        self.columns = list(columns)
+        self.numeric = [col for col in self.columns if col in set(numeric)]
+        self.domains = domains  # column -> list of trained categories
+        self._names = {_name_key(col): col for col in self.columns}
+        self._lookups = {}
+        for col, categories in domains.items():
+            lookup = {_value_key(value): value for value in categories}
+            for alias, value in VALUE_ALIASES.items():
+                if value in categories:
+                    lookup.setdefault(alias, value)
+            self._lookups[col] = lookup
+
+    @classmethod
+    def from_pipeline(cls, pipeline):
+        """Reads the schema off a fitted preprocessor + classifier pipeline."""
+        columns = list(pipeline.feature_names_in_)
+        numeric, domains = [], {}
+        steps = getattr(pipeline, "steps", [])
+        preprocessor = steps[0][1] if steps else None
+        if isinstance(preprocessor, ColumnTransformer):
+            for _, transformer, cols in preprocessor.transformers_:
+                encoder = transformer
+                if isinstance(transformer, Pipeline):
+                    encoder = transformer.steps[0][1]
+                if isinstance(encoder, OneHotEncoder):
+                    domains.update({col: list(categories) for col, categories in zip(cols, encoder.categories_)})
+                elif transformer != "drop":
+                    numeric.extend(cols)
+        return cls(columns, numeric, domains)
+
+    def rename(self, columns):
+        """Maps upload column names onto schema names; unknown names are kept.
+
+        An exact schema name wins over aliases of the same column.
+        """
+        columns = list(columns)
+        taken = set(columns) & set(self.columns)
+        names = {}
+        for col in columns:
+            name = col if col in taken else self._names.get(_name_key(col), col)
+            if name != col and name in taken:
+                name = col
+            taken.add(name)
+            names[col] = name
+        return names
+
+    def missing(self, columns):
+        """Schema columns an upload does not provide under any alias, in order."""
+        present = set(self.rename(columns).values())
+        return [col for col in self.columns if col not in present]
+
+    def validate(self, frame, first_row=0):
+        """Returns (clean, quarantined, errors) for one batch of an upload.
+
+        clean holds the normalized schema columns of the valid rows, plus any
+        extra upload columns. quarantined holds the invalid rows as uploaded,
+        with its Row and an Errors column. errors has one row per failed cell: Row (the
+        0-based data row of the upload, offset by first_row), column, value
+        and error. Raises ValueError if a schema column is missing.
+        """
+        missing = self.missing(frame.columns)
+        if missing:
+            raise ValueError(f"Upload is missing columns: {', '.join(missing)}")
+        names = self.rename(frame.columns)
+        sources = {name: col for col, name in names.items()}
+        normalized = frame.rename(columns=names)
+        failures = []  # (column, reason, mask)
+
+        for col in self.numeric:
+            raw = normalized[col]
+            text = raw.astype("string").str.strip() if raw.dtype == object else raw
+            values = pd.to_numeric(text, errors="coerce")
+            blank = raw.isna().to_numpy() | (text == "").fillna(False).to_numpy()
+            failures.append((col, "missing value", blank))
+            failures.append((col, "not a number", values.isna().to_numpy() & ~blank))
+            failures.append((col, "negative value", (values < 0).fillna(False).to_numpy()))
+            normalized[col] = values.astype(float)
+
+        for col, lookup in self._lookups.items():
+            raw = normalized[col]
+            # One dictionary lookup per distinct value, then a take over the codes
+            codes, uniques = pd.factorize(raw, use_na_sentinel=True)
+            mapped = [lookup.get(_value_key(value)) for value in uniques]
+            unknown = np.array([value is None for value in mapped] + [False])
+            blank = codes < 0
+            failures.append((col, "missing value", blank))
+            failures.append((col, f"not one of {', '.join(map(str, self.domains[col]))}", unknown[codes]))
+            normalized[col] = np.array(mapped + [None], dtype=object)[codes]
+
+        bad = np.zeros(len(frame), dtype=bool)
+        reports = {ROW_COLUMN: [], "column": [], "value": [], "error": []}
+        for col, reason, mask in failures:
+            rows = np.flatnonzero(mask)
+            if len(rows):
+                bad[rows] = True
+                reports[ROW_COLUMN].append(rows + first_row)
+                reports["column"].append(np.full(len(rows), col, dtype=object))
+                reports["value"].append(frame[sources[col]].to_numpy(dtype=object)[rows])
+                reports["error"].append(np.full(len(rows), reason, dtype=object))
+        errors = pd.DataFrame({name: np.concatenate(parts) if parts else [] for name, parts in reports.items()})
+        errors = errors.sort_values(ROW_COLUMN, kind="stable", ignore_index=True)
+
+        rows = np.flatnonzero(bad)
+        quarantined = frame.iloc[rows].copy()
+        quarantined.insert(0, ROW_COLUMN, rows + first_row)
+        quarantined[ERROR_COLUMN] = ""
+        if len(rows):
+            messages = (errors["column"] + ": " + errors["error"]).groupby(errors[ROW_COLUMN], sort=False).agg("; ".join)
+            quarantined[ERROR_COLUMN] = messages.reindex(rows + first_row).to_numpy()
+        clean = normalized.take(np.flatnonzero(~bad)) if len(quarantined) else normalized
+        return clean, quarantined, errors